@@ -0,0 +1,103 @@
+"""
+Markdown chunking for Last Z Bot
+Splits guides and articles into overlapping, heading-aware chunks so each
+section can be embedded and retrieved on its own
+"""
+
+from __future__ import annotations
+
+import os
+import re
+
+# Chunk size (characters) and overlap carried into the next chunk of a section
+CHUNK_MAX_CHARS = int(os.environ.get("CHUNK_MAX_CHARS", "1000"))
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "150"))
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+def split_sections(content: str) -> list[tuple[str, str]]:
+    """Split markdown into (heading path, body) pairs, e.g. ("HQ > Upgrades", ...)"""
+    sections = []
+    path: list[tuple[int, str]] = []
+    lines: list[str] = []
+    in_code = False
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            sections.append((" > ".join(title for _, title in path), body))
+        lines.clear()
+
+    for line in content.split("\n"):
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else _HEADING_RE.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            path = [(lvl, title) for lvl, title in path if lvl < level]
+            path.append((level, match.group(2)))
+        else:
+            lines.append(line)
+    flush()
+    return sections
+
+
+def _tail(text: str, size: int) -> str:
+    """Last ~size characters of text, starting on a word boundary"""
+    if size <= 0 or not text:
+        return ""
+    if len(text) <= size:
+        return text
+    tail = text[-size:]
+    space = tail.find(" ")
+    return tail[space + 1 :] if space != -1 else ""
+
+
+def _split_long(paragraph: str, max_chars: int, overlap: int) -> list[str]:
+    """Window a paragraph longer than max_chars on word boundaries"""
+    pieces = []
+    start = 0
+    while len(paragraph) - start > max_chars:
+        end = paragraph.rfind(" ", start, start + max_chars)
+        if end <= start:
+            end = start + max_chars
+        pieces.append(paragraph[start:end].strip())
+        next_start = end - overlap
+        if overlap:
+            space = paragraph.find(" ", next_start, end)
+            next_start = space + 1 if space != -1 else next_start
+        start = max(next_start, start + 1)
+    pieces.append(paragraph[start:].strip())
+    return [piece for piece in pieces if piece]
+
+
+def chunk_markdown(
+    content: str, max_chars: int = CHUNK_MAX_CHARS, overlap: int = CHUNK_OVERLAP
+) -> list[tuple[str, str]]:
+    """Split markdown into (section, chunk text) pairs
+
+    Chunks never cross a heading. Paragraphs are packed up to max_chars, and
+    each new chunk in a section starts with the tail of the previous one.
+    """
+    chunks = []
+    for section, body in split_sections(content):
+        current = ""
+        for paragraph in _PARAGRAPH_RE.split(body):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            for piece in _split_long(paragraph, max_chars, overlap):
+                if not current:
+                    current = piece
+                elif len(current) + 2 + len(piece) <= max_chars:
+                    current = f"{current}\n\n{piece}"
+                else:
+                    chunks.append((section, current))
+                    carry = _tail(current, min(overlap, max_chars - len(piece) - 2))
+                    current = f"{carry}\n\n{piece}" if carry else piece
+        if current:
+            chunks.append((section, current))
+    return chunks
@@ -0,0 +1,46 @@
+"""
+LLM context blocks for Last Z Bot
+Renders the prompt text for a knowledge item once, when it is loaded, so a
+request only has to concatenate ready-made blocks
+"""
+
+from __future__ import annotations
+
+import json
+
+# Item types handed to the LLM as their full JSON record
+STRUCTURED_TYPES = ("hero", "research", "building", "equipment")
+
+# Longest text excerpt placed in the prompt (characters)
+CONTEXT_TEXT_MAX_CHARS = 1000
+
+
+def _strip_source_lines(content: str) -> str:
+    """Drop "Sources:" metadata lines (they invite made-up citations)"""
+    lines = [
+        line
+        for line in content.split("\n")
+        if not line.strip().startswith(("Sources:", "Source:"))
+    ]
+    return "\n".join(lines).strip()
+
+
+def _item_content(item) -> str:
+    data = item.data
+    if item.type in STRUCTURED_TYPES and isinstance(data, dict):
+        return json.dumps(data, indent=2)
+    if item.content is not None:
+        # Markdown chunks are already sized for the context window
+        return item.content
+    if isinstance(data, dict) and "content" in data:
+        return data["content"][:CONTEXT_TEXT_MAX_CHARS]
+    return item.text
+
+
+def render_context_block(item) -> str:
+    """Indented prompt text for an item (everything below its SOURCE line)"""
+    content = _strip_source_lines(_item_content(item))
+    if item.type in STRUCTURED_TYPES:
+        lines = "".join(f"   {line}\n" for line in content.split("\n"))
+        return f"   STRUCTURED DATA (JSON):\n{lines}"
+    return f"   {content[:CONTEXT_TEXT_MAX_CHARS]}...\n"
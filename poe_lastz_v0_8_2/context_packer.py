@@ -0,0 +1,114 @@
+"""
+Token-budgeted prompt packing for Last Z Bot
+Fits the system prompt, guardrails, retrieved knowledge and chat history into
+a fixed token budget, so upstream latency and cost stay bounded no matter how
+large the retrieved documents are
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+
+# Prompt budget (tokens) for the upstream chat model, and the part of it kept
+# for the most recent conversation turns before knowledge blocks fill the rest
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "8000"))
+CONTEXT_HISTORY_TOKENS = int(os.environ.get("CONTEXT_HISTORY_TOKENS", "1500"))
+
+# Smallest trimmed knowledge block worth sending (tokens)
+MIN_BLOCK_TOKENS = 100
+
+# Rough BPE ratio for English and JSON text, plus per-message framing tokens
+BYTES_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TRIM_MARKER = "   ... (trimmed to fit the context budget)\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 UTF-8 bytes per token), no tokenizer needed"""
+    return -(-len(text.encode()) // BYTES_PER_TOKEN)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, on a line boundary where possible"""
+    max_bytes = max_tokens * BYTES_PER_TOKEN
+    encoded = text.encode()
+    if len(encoded) <= max_bytes:
+        return text
+    cut = encoded[: max(0, max_bytes - len(TRIM_MARKER.encode()))]
+    cut = cut.decode(errors="ignore")
+    line_end = cut.rfind("\n")
+    if line_end > 0:
+        cut = cut[: line_end + 1]
+    return cut + TRIM_MARKER
+
+
+@dataclass
+class PackedContext:
+    """What made it into the prompt, with its estimated size"""
+
+    blocks: list[str] = field(default_factory=list)  # best first
+    block_indices: list[int] = field(default_factory=list)
+    history_indices: list[int] = field(default_factory=list)  # oldest first
+    tokens: int = 0
+    trimmed_blocks: int = 0
+    dropped_blocks: int = 0
+    dropped_messages: int = 0
+
+
+def pack_context(
+    fixed: list[str],
+    blocks: list[str],
+    history: list[str],
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    history_reserve: int = CONTEXT_HISTORY_TOKENS,
+) -> PackedContext:
+    """Choose the knowledge blocks and history messages that fit the budget
+
+    ``fixed`` (system prompt, guardrails, latest user message) always goes
+    in. ``blocks`` are retrieved knowledge blocks, best first; ``history``
+    the earlier messages, oldest first. The newest history fills up to
+    ``history_reserve``, then blocks go in by relevance (one that doesn't fit
+    is trimmed if at least MIN_BLOCK_TOKENS remain, else dropped), and older
+    history takes whatever is left. History is kept as a contiguous run of
+    the most recent turns.
+    """
+    packed = PackedContext()
+    used = sum(estimate_tokens(text) + MESSAGE_OVERHEAD_TOKENS for text in fixed)
+    available = remaining = max(0, budget - used)
+    history_costs = [
+        estimate_tokens(text) + MESSAGE_OVERHEAD_TOKENS for text in history
+    ]
+    kept = []
+
+    def take_history(limit):
+        nonlocal remaining
+        spent = 0
+        for idx in range(len(history) - len(kept) - 1, -1, -1):
+            cost = history_costs[idx]
+            if cost > min(limit - spent, remaining):
+                break
+            kept.append(idx)
+            spent += cost
+            remaining -= cost
+
+    take_history(history_reserve)
+    for idx, block in enumerate(blocks):
+        cost = estimate_tokens(block)
+        if cost > remaining:
+            if remaining < MIN_BLOCK_TOKENS:
+                packed.dropped_blocks += 1
+                continue
+            block = trim_to_tokens(block, remaining)
+            cost = estimate_tokens(block)
+            packed.trimmed_blocks += 1
+        packed.blocks.append(block)
+        packed.block_indices.append(idx)
+        remaining -= cost
+    take_history(remaining)
+
+    packed.history_indices = sorted(kept)
+    packed.dropped_messages = len(history) - len(kept)
+    packed.tokens = used + available - remaining
+    return packed
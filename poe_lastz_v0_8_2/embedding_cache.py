@@ -0,0 +1,131 @@
+"""
+Binary embedding cache for Last Z Bot
+Vectors live in a float32 .npy matrix that is memory-mapped at startup;
+a small JSON manifest maps content-hash keys to matrix rows.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+CACHE_VERSION = "0.8.2-binary"
+
+
+def get_cache_files(cache_base: str) -> tuple[str, str]:
+    """Return the (matrix, manifest) file paths for a cache base path"""
+    return f"{cache_base}.f32.npy", f"{cache_base}.manifest.json"
+
+
+def load_embedding_cache(cache_base: str, model: str) -> dict[str, np.ndarray] | None:
+    """Memory-map the cached matrix and return key -> row view (no copying)
+
+    Returns None if there is no usable cache for this model. Legacy
+    ``embeddings_cache.json`` files are migrated to the binary format first.
+    """
+    matrix_path, manifest_path = get_cache_files(cache_base)
+
+    if not os.path.exists(manifest_path):
+        if not _migrate_json_cache(cache_base, model):
+            print(f"📂 No embeddings cache found at {manifest_path}")
+            return None
+
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("model") != model:
+            print("⚠️  Cache invalid - built with a different embedding model")
+            return None
+
+        keys = manifest.get("keys", [])
+        if not keys:
+            return {}
+
+        matrix = np.load(matrix_path, mmap_mode="r")
+        if matrix.dtype != np.float32 or matrix.shape != (len(keys), manifest["dim"]):
+            print("⚠️  Cache invalid - matrix does not match manifest")
+            return None
+
+        print(
+            f"✅ Memory-mapped {len(keys)} embeddings from {matrix_path} "
+            f"(version {manifest.get('version', 'unknown')})"
+        )
+        return {key: matrix[row] for row, key in enumerate(keys)}
+
+    except Exception as e:
+        print(f"❌ Error loading embeddings cache: {e}")
+        return None
+
+
+def save_embedding_cache(cache_base: str, model: str, embeddings: dict) -> bool:
+    """Write embeddings as a float32 matrix plus manifest (atomic replace)"""
+    matrix_path, manifest_path = get_cache_files(cache_base)
+
+    try:
+        keys = list(embeddings)
+        if keys:
+            matrix = np.stack(
+                [np.asarray(embeddings[key], dtype=np.float32) for key in keys]
+            )
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+
+        manifest = {
+            "version": CACHE_VERSION,
+            "timestamp": datetime.now().isoformat(),
+            "model": model,
+            "dim": int(matrix.shape[1]),
+            "embeddings_count": len(keys),
+            "keys": keys,
+        }
+
+        print(f"💾 Saving embeddings cache to {matrix_path}")
+        # Write to temp files first so a crash never leaves a torn cache behind.
+        # Replacing the file is safe even while the old matrix is memory-mapped.
+        with open(f"{matrix_path}.tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(f"{matrix_path}.tmp", matrix_path)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        file_size = os.path.getsize(matrix_path) / (1024 * 1024)  # MB
+        print(f"✅ Saved {len(keys)} embeddings to disk ({file_size:.2f} MB)")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error saving embeddings cache: {e}")
+        return False
+
+
+def _migrate_json_cache(cache_base: str, model: str) -> bool:
+    """Convert a legacy embeddings_cache.json into the binary format"""
+    json_path = f"{cache_base}.json"
+    if not os.path.exists(json_path):
+        return False
+
+    try:
+        print(f"🔄 Migrating JSON embeddings cache {json_path} to binary format")
+        with open(json_path, encoding="utf-8") as f:
+            cache_data = json.load(f)
+
+        # Pre-0.8.2 caches were keyed by list index and can't be reused
+        if cache_data.get("model") != model:
+            print("⚠️  JSON cache uses an old key format - discarding")
+            os.remove(json_path)
+            return False
+
+        if not save_embedding_cache(
+            cache_base, model, cache_data.get("embeddings", {})
+        ):
+            return False
+        os.remove(json_path)
+        return True
+
+    except Exception as e:
+        print(f"❌ Error migrating embeddings cache: {e}")
+        return False
@@ -0,0 +1,249 @@
+"""
+Entity index for Last Z Bot
+Maps hero/building/research/equipment names and aliases to knowledge items,
+with a character trigram index for typo-tolerant matching
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+
+from poe_lastz_v0_8_2.text_utils import STOPWORDS, tokenize
+
+# Item types whose names can be looked up directly (no vector search)
+ENTITY_TYPES = ("hero", "building", "research", "equipment")
+
+# Keys in an item's data that hold alternative names
+ALIAS_KEYS = ("aliases", "alias", "nicknames", "nickname", "short_name")
+
+# Fuzzy matching: shortest span considered, candidates verified per span, and
+# trigram posting lists longer than this are skipped (too common to discriminate)
+FUZZY_MIN_LENGTH = 4
+FUZZY_MAX_CANDIDATES = 5
+FUZZY_MAX_POSTINGS = 256
+
+
+def entity_aliases(data) -> tuple[str, ...]:
+    """Alternative names listed in an entity item's data"""
+    aliases = []
+    if isinstance(data, dict):
+        for key in ALIAS_KEYS:
+            value = data.get(key)
+            if isinstance(value, str):
+                aliases.append(value)
+            elif isinstance(value, list):
+                aliases.extend(str(alias) for alias in value if alias)
+    return tuple(aliases)
+
+
+def get_entity_names(item) -> list[str]:
+    """Return an entity item's name followed by its aliases
+
+    Uses ``item.aliases`` (set at load), so building the index never reads
+    payloads back from the PayloadStore.
+    """
+    names = [str(item.name or ""), *item.aliases]
+    return [name for name in names if name.strip()]
+
+
+def trigrams(text: str) -> set[str]:
+    """Character trigrams of a (space-free) string, padded at the edges"""
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edit_distance(length: int) -> int:
+    """Typo budget for a name of this many characters"""
+    if length <= 4:
+        return 0
+    if length <= 7:
+        return 1
+    if length <= 11:
+        return 2
+    return 3
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up early once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _digits(text: str) -> str:
+    return "".join(char for char in text if char.isdigit())
+
+
+class EntityIndex:
+    """Inverted index of tokenized entity names -> item indices
+
+    Exact lookup walks the message tokens once, trying the longest phrase that
+    can start at each token, so cost is O(message length) regardless of
+    catalog size. Tokens left unmatched are then checked against a trigram
+    index of the names with spaces removed ("head quarters" -> "headquarters"),
+    and the few best trigram candidates are verified with edit distance.
+    """
+
+    def __init__(self):
+        self.phrases: dict[tuple[str, ...], list[int]] = {}
+        self.max_len: dict[str, int] = {}  # first token -> longest phrase length
+        self.max_phrase_len = 0
+        self.compact_names: list[str] = []  # fuzzy entry id -> name without spaces
+        self.compact_phrases: dict[str, tuple[str, ...]] = {}
+        # (trigram, name length) -> fuzzy entry ids
+        self.trigram_postings: dict[tuple[str, int], list[int]] = {}
+
+    @classmethod
+    def build(cls, items) -> EntityIndex:
+        index = cls()
+        for idx, item in enumerate(items):
+            if item.type not in ENTITY_TYPES:
+                continue
+            for name in get_entity_names(item):
+                index.add(name, idx)
+        return index
+
+    def add(self, name: str, item_index: int) -> None:
+        phrase = tuple(tokenize(name))
+        if not phrase:
+            return
+        targets = self.phrases.setdefault(phrase, [])
+        if item_index not in targets:
+            targets.append(item_index)
+        self.max_len[phrase[0]] = max(self.max_len.get(phrase[0], 0), len(phrase))
+        self.max_phrase_len = max(self.max_phrase_len, len(phrase))
+
+        compact = "".join(phrase)
+        if compact not in self.compact_phrases:
+            self.compact_phrases[compact] = phrase
+            entry_id = len(self.compact_names)
+            self.compact_names.append(compact)
+            for gram in trigrams(compact):
+                key = (gram, len(compact))
+                self.trigram_postings.setdefault(key, []).append(entry_id)
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def find(self, text: str, fuzzy: bool = True) -> list[dict]:
+        """Find entities named in text (longest match wins, each item once)
+
+        Each match has ``item_index``, ``matched`` (the indexed name), ``span``
+        (the message tokens it covers), ``distance`` (0 for exact matches) and
+        ``score`` (1.0 minus the distance relative to the name length).
+        """
+        tokens = tokenize(text)
+        matches = []
+        seen = set()
+        covered = [False] * len(tokens)
+        pos = 0
+        while pos < len(tokens):
+            longest = min(self.max_len.get(tokens[pos], 0), len(tokens) - pos)
+            for length in range(longest, 0, -1):
+                phrase = tuple(tokens[pos : pos + length])
+                item_indices = self.phrases.get(phrase)
+                if item_indices:
+                    span = " ".join(phrase)
+                    for item_index in item_indices:
+                        if item_index not in seen:
+                            seen.add(item_index)
+                            matches.append(
+                                {
+                                    "item_index": item_index,
+                                    "matched": span,
+                                    "span": span,
+                                    "distance": 0,
+                                    "score": 1.0,
+                                }
+                            )
+                    covered[pos : pos + length] = [True] * length
+                    pos += length
+                    break
+            else:
+                pos += 1
+
+        if fuzzy and not all(covered):
+            for match in self._fuzzy_find(tokens, covered):
+                if match["item_index"] not in seen:
+                    seen.add(match["item_index"])
+                    matches.append(match)
+        return matches
+
+    def _fuzzy_find(self, tokens: list[str], covered: list[bool]) -> list[dict]:
+        """Closest names for uncovered token spans (best, non-overlapping first)"""
+        max_span = self.max_phrase_len
+        candidates = []
+        for start in range(len(tokens)):
+            for end in range(start + 1, min(start + max_span, len(tokens)) + 1):
+                if covered[end - 1]:
+                    break
+                span = tokens[start:end]
+                # Don't let filler words start or end a fuzzy span
+                if span[0] in STOPWORDS or span[-1] in STOPWORDS:
+                    continue
+                compact = "".join(span)
+                if len(compact) < FUZZY_MIN_LENGTH:
+                    continue
+                for entry_id, distance in self._closest(compact):
+                    candidates.append((distance, -(end - start), start, end, entry_id))
+
+        matches = []
+        for distance, _, start, end, entry_id in sorted(candidates):
+            if any(covered[start:end]):
+                continue
+            covered[start:end] = [True] * (end - start)
+            name = self.compact_names[entry_id]
+            phrase = self.compact_phrases[name]
+            for item_index in self.phrases[phrase]:
+                matches.append(
+                    {
+                        "item_index": item_index,
+                        "matched": " ".join(phrase),
+                        "span": " ".join(tokens[start:end]),
+                        "distance": distance,
+                        "score": round(1.0 - distance / len(name), 3),
+                    }
+                )
+        return matches
+
+    def _closest(self, compact: str) -> list[tuple[int, int]]:
+        """(entry_id, edit distance) of indexed names within the typo budget"""
+        # Only names whose length is within the typo budget can match
+        limit = max_edit_distance(len(compact))
+        lengths = range(len(compact) - limit, len(compact) + limit + 1)
+
+        overlap = Counter()
+        for gram in trigrams(compact):
+            for length in lengths:
+                postings = self.trigram_postings.get((gram, length), ())
+                if len(postings) <= FUZZY_MAX_POSTINGS:
+                    overlap.update(postings)
+        if not overlap:
+            return []
+
+        digits = _digits(compact)
+        results = []
+        for entry_id, _ in overlap.most_common(FUZZY_MAX_CANDIDATES):
+            name = self.compact_names[entry_id]
+            # Numbers are never typos: "research" must not match "Research 4"
+            if _digits(name) != digits:
+                continue
+            limit = max_edit_distance(min(len(name), len(compact)))
+            distance = edit_distance(compact, name, limit)
+            if distance <= limit:
+                results.append((entry_id, distance))
+        return results
@@ -0,0 +1,98 @@
+"""
+Knowledge base file watcher for Last Z Bot
+Notices edits under the data directory (inotify via watchfiles, polling
+otherwise) and reports the touched files in debounced batches
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+try:
+    import watchfiles
+except ImportError:  # installed with uvicorn[standard]; fall back to polling
+    watchfiles = None
+
+# Quiet period that ends a burst of file events, and the polling fallback rate
+KB_WATCH_DEBOUNCE_MS = int(os.environ.get("KB_WATCH_DEBOUNCE_MS", "200"))
+KB_WATCH_POLL_INTERVAL = float(os.environ.get("KB_WATCH_POLL_INTERVAL", "0.5"))
+
+# Editing this file can change which files are loaded
+DATA_INDEX_FILENAME = "data_index.md"
+
+
+def backend() -> str:
+    return "watchfiles" if watchfiles is not None else "polling"
+
+
+def _signatures(paths) -> dict:
+    """path -> (mtime_ns, size), or None for files that no longer exist"""
+    signatures = {}
+    for path in paths or ():
+        try:
+            stat = os.stat(path)
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signatures[path] = None
+    return signatures
+
+
+async def _settled_changes(detect_changes, debounce_ms: int) -> dict:
+    """Signatures of changed files once they stop changing for debounce_ms"""
+    current = _signatures(await asyncio.to_thread(detect_changes))
+    while current:
+        await asyncio.sleep(debounce_ms / 1000)
+        latest = _signatures(await asyncio.to_thread(detect_changes))
+        if latest == current:
+            break
+        current = latest
+    return current
+
+
+async def _poll_changes(detect_changes, debounce_ms: int, poll_interval: float):
+    # detect_changes keeps reporting a file until the reload lands, so only
+    # files whose mtime/size moved since the last batch are reported again
+    reported = {}
+    while True:
+        await asyncio.sleep(poll_interval)
+        changes = await _settled_changes(detect_changes, debounce_ms)
+        fresh = [path for path, sig in changes.items() if reported.get(path) != sig]
+        reported = changes
+        if fresh:
+            yield sorted(fresh)
+
+
+async def watch_changes(
+    paths: list[str],
+    detect_changes,
+    debounce_ms: int = KB_WATCH_DEBOUNCE_MS,
+    poll_interval: float = KB_WATCH_POLL_INTERVAL,
+):
+    """Yield sorted lists of absolute paths changed under any of ``paths``
+
+    Uses watchfiles (inotify on Linux) when installed. Otherwise it polls
+    ``detect_changes()`` (mtime/size against the last load) every
+    ``poll_interval`` seconds. Events closer together than ``debounce_ms``
+    are delivered as one batch. Either way only files ``detect_changes()``
+    reports count: scratch files next to the data are ignored, and an edit to
+    data_index.md yields whatever files it adds or drops.
+    """
+    if watchfiles is None:
+        async for batch in _poll_changes(detect_changes, debounce_ms, poll_interval):
+            yield batch
+        return
+
+    async for changes in watchfiles.awatch(
+        *paths, debounce=debounce_ms, step=min(50, debounce_ms)
+    ):
+        detected = await asyncio.to_thread(detect_changes)
+        if not detected:
+            continue
+        touched = {os.path.realpath(changed) for _, changed in changes}
+        if any(os.path.basename(path) == DATA_INDEX_FILENAME for path in touched):
+            paths = detected
+        else:
+            paths = [path for path in detected if os.path.realpath(path) in touched]
+        if paths:
+            yield sorted(paths)
@@ -0,0 +1,122 @@
+"""
+JSON record extraction for Last Z Bot
+Walks arbitrary JSON documents and yields one record per event/item/entry,
+each with a short searchable summary
+"""
+
+from __future__ import annotations
+
+import os
+
+# Keys that name a record ("id" marks a record but is a poor display name)
+NAME_KEYS = ("name", "title", "label", "event")
+RECORD_KEYS = NAME_KEYS + ("id", "key")
+
+# Document bookkeeping next to the records, never indexed on its own
+METADATA_KEYS = frozenset(
+    {"version", "schema", "schema_version", "$schema", "generated_at", "updated_at"}
+)
+
+# Longest generated summary (characters)
+RECORD_SUMMARY_MAX_CHARS = int(os.environ.get("RECORD_SUMMARY_MAX_CHARS", "800"))
+
+
+def _is_container(value) -> bool:
+    return isinstance(value, (dict, list))
+
+
+def _is_scalar_list(value) -> bool:
+    return isinstance(value, list) and not any(_is_container(v) for v in value)
+
+
+def _is_field(value) -> bool:
+    """A value that belongs to its record rather than holding more records"""
+    return not _is_container(value) or _is_scalar_list(value)
+
+
+def is_record(data) -> bool:
+    """A dict is a record if it is named/keyed or holds no nested containers"""
+    if not isinstance(data, dict) or not data:
+        return False
+    if any(key in data and _is_field(data[key]) for key in RECORD_KEYS):
+        return True
+    return all(_is_field(value) for value in data.values())
+
+
+def iter_records(data, path: tuple[str, ...] = ()):
+    """Yield (path, record) for every record in a parsed JSON document
+
+    Lists are walked item by item, and dicts that are not records themselves
+    are treated as containers keyed by section or record name (the key ends
+    up in ``path``). Loose fields of a container form one record; in a dict
+    that also holds records, METADATA_KEYS (``"version": 2`` next to a list
+    of events) are left out of it.
+    """
+    if isinstance(data, list):
+        scalars = [value for value in data if not _is_container(value)]
+        if scalars:
+            yield path, {"values": scalars}
+        for value in data:
+            if _is_container(value):
+                yield from iter_records(value, path)
+    elif isinstance(data, dict):
+        if is_record(data):
+            yield path, data
+            return
+        fields = {key: value for key, value in data.items() if _is_field(value)}
+        if len(fields) < len(data):
+            fields = {
+                key: value for key, value in fields.items() if key not in METADATA_KEYS
+            }
+        if fields:
+            yield path, fields
+        for key, value in data.items():
+            if not _is_field(value):
+                yield from iter_records(value, path + (str(key),))
+
+
+def _humanize(key: str) -> str:
+    return key.replace("_", " ").strip().title()
+
+
+def record_name(record: dict, path: tuple[str, ...]) -> str:
+    """Display name of a record: its name field, else the key it sits under"""
+    for key in NAME_KEYS:
+        value = record.get(key)
+        if value and not _is_container(value):
+            return str(value)
+    return _humanize(path[-1]) if path else ""
+
+
+def record_heading(name: str, path: tuple[str, ...]) -> str:
+    """Breadcrumb for a record, e.g. 'Heroes > Sophia > Skills > Bash'"""
+    parts = [_humanize(part) for part in path]
+    if name and (not parts or parts[-1] != name):
+        parts.append(name)
+    return " > ".join(parts)
+
+
+def _flatten(value, prefix: str = ""):
+    """Yield (key path, scalar text) pairs for a nested value"""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            label = str(key).replace("_", " ")
+            yield from _flatten(child, f"{prefix}.{label}" if prefix else label)
+    elif _is_scalar_list(value):
+        yield prefix, ", ".join(str(v) for v in value)
+    elif isinstance(value, list):
+        for position, child in enumerate(value, 1):
+            yield from _flatten(child, f"{prefix} {position}")
+    elif value is not None and value != "":
+        yield prefix, str(value)
+
+
+def summarize_record(record: dict, max_chars: int = RECORD_SUMMARY_MAX_CHARS) -> str:
+    """'key: value; ...' text for embedding, cut off at max_chars"""
+    summary = ""
+    for key, text in _flatten(record):
+        part = f"{key}: {text}" if key else text
+        summary = f"{summary}; {part}" if summary else part
+        if len(summary) > max_chars:
+            return summary[:max_chars].rsplit(" ", 1)[0] + "..."
+    return summary
@@ -0,0 +1,192 @@
+"""
+Compiled knowledge base bundle for Last Z Bot
+One file holding the processed items, every index and the vector matrix, so a
+cold start is a single load + mmap instead of re-walking the data directory
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import struct
+import time
+
+import numpy as np
+
+from poe_lastz_v0_8_2.chunking import CHUNK_MAX_CHARS, CHUNK_OVERLAP
+from poe_lastz_v0_8_2.json_records import RECORD_SUMMARY_MAX_CHARS
+from poe_lastz_v0_8_2.snapshot import KnowledgeSnapshot
+from poe_lastz_v0_8_2.vector_index import VectorIndex
+
+BUNDLE_FILENAME = "kb_bundle.bin"
+BUNDLE_MAGIC = b"LZKB"
+
+# Bump for changes the source hash below can't see (e.g. the file layout)
+BUNDLE_FORMAT = 7
+
+# Modules whose code shapes the bundle's items, payloads and indexes: a deploy
+# that changes any of them invalidates the bundle
+BUNDLE_SOURCE_MODULES = (
+    "chunking",
+    "context_blocks",
+    "entity_index",
+    "json_records",
+    "kb_bundle",
+    "knowledge_base",
+    "knowledge_item",
+    "lexical_index",
+    "payload_store",
+    "snapshot",
+    "text_utils",
+    "vector_index",
+)
+
+# Matrix offset alignment (keeps the mmap'd rows cache-line aligned)
+_ALIGNMENT = 64
+
+
+def source_hash() -> str:
+    """sha256 of the BUNDLE_SOURCE_MODULES sources (first 16 hex digits)"""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in BUNDLE_SOURCE_MODULES:
+        with open(os.path.join(package_dir, f"{name}.py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def bundle_config(embedding_model: str) -> dict:
+    """Everything besides the data files that shapes a bundle's contents"""
+    return {
+        "format": BUNDLE_FORMAT,
+        "sources": source_hash(),
+        "embedding_model": embedding_model,
+        "chunk_max_chars": CHUNK_MAX_CHARS,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "record_summary_max_chars": RECORD_SUMMARY_MAX_CHARS,
+    }
+
+
+def save_bundle(
+    path: str, snapshot: KnowledgeSnapshot, state: dict, config: dict
+) -> bool:
+    """Write snapshot + loader state as one bundle file (atomic replace)
+
+    Layout: magic | header length | JSON header | pickled items and indexes |
+    padding | float32 vector matrix. The header carries the config and a
+    sha256 of both blobs.
+    """
+    try:
+        start_time = time.time()
+        vector_index = snapshot.vector_index
+        payload = pickle.dumps(
+            {
+                "items": snapshot.items,
+                "entity_index": snapshot.entity_index,
+                "lexical_index": snapshot.lexical_index,
+                "item_ids": vector_index.item_ids,
+                "state": state,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        matrix = np.ascontiguousarray(vector_index.matrix, dtype=np.float32)
+        header = {
+            "config": config,
+            "created_at": time.time(),
+            "payload_size": len(payload),
+            "payload_sha256": hashlib.sha256(payload).hexdigest(),
+            "matrix_shape": list(matrix.shape),
+            "matrix_sha256": hashlib.sha256(matrix).hexdigest(),
+        }
+        header_bytes = json.dumps(header).encode()
+        payload_offset = len(BUNDLE_MAGIC) + 4 + len(header_bytes)
+        matrix_offset = -(-(payload_offset + len(payload)) // _ALIGNMENT) * _ALIGNMENT
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(BUNDLE_MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            f.write(payload)
+            f.write(b"\0" * (matrix_offset - payload_offset - len(payload)))
+            f.write(matrix.tobytes())
+        os.replace(temp_path, path)
+
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(
+            f"📦 Compiled knowledge bundle {path}: {len(snapshot.items)} items, "
+            f"{len(vector_index)} vectors ({size:.2f} MB) in {time.time() - start_time:.2f}s"
+        )
+        return True
+
+    except Exception as e:
+        print(f"❌ Error writing knowledge bundle: {e}")
+        return False
+
+
+def load_bundle(path: str, config: dict) -> tuple[KnowledgeSnapshot, dict] | None:
+    """Load a bundle as (unpublished snapshot, loader state), or None if unusable
+
+    The vector matrix is memory-mapped, not copied. A bundle built with a
+    different config, or whose checksums don't match, is ignored.
+    """
+    if not os.path.exists(path):
+        print(f"📂 No knowledge bundle found at {path}")
+        return None
+
+    try:
+        start_time = time.time()
+        with open(path, "rb") as f:
+            if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                print("⚠️  Knowledge bundle invalid - bad magic")
+                return None
+            (header_size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_size))
+            if header.get("config") != config:
+                print("⚠️  Knowledge bundle stale - built with different settings")
+                return None
+            matrix_offset = f.tell() + header["payload_size"]
+            payload = f.read(header["payload_size"])
+
+        if hashlib.sha256(payload).hexdigest() != header["payload_sha256"]:
+            print("⚠️  Knowledge bundle invalid - payload checksum mismatch")
+            return None
+
+        rows, dim = header["matrix_shape"]
+        if rows:
+            matrix_offset = -(-matrix_offset // _ALIGNMENT) * _ALIGNMENT
+            matrix = np.memmap(
+                path,
+                dtype=np.float32,
+                mode="r",
+                offset=matrix_offset,
+                shape=(rows, dim),
+            )
+        else:
+            matrix = np.zeros((rows, dim), dtype=np.float32)
+        if hashlib.sha256(matrix).hexdigest() != header["matrix_sha256"]:
+            print("⚠️  Knowledge bundle invalid - matrix checksum mismatch")
+            return None
+
+        contents = pickle.loads(payload)
+        snapshot = KnowledgeSnapshot(
+            items=contents["items"],
+            entity_index=contents["entity_index"],
+            lexical_index=contents["lexical_index"],
+            vector_index=VectorIndex(matrix, contents["item_ids"]),
+        )
+        print(
+            f"📦 Loaded knowledge bundle: {len(snapshot.items)} items, "
+            f"{len(snapshot.vector_index)} vectors in {time.time() - start_time:.3f}s"
+        )
+        return snapshot, contents["state"]
+
+    except FileNotFoundError as e:
+        # e.g. the payload file it references was replaced by a full rebuild
+        print(f"⚠️  Knowledge bundle stale - {e.filename} is gone")
+        return None
+    except Exception as e:
+        print(f"❌ Error loading knowledge bundle: {e}")
+        return None
@@ -1,79 +1,243 @@
 """Knowledge base loading and processing for Last Z Bot"""
 
+import hashlib
 import json
 import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from poe_lastz_v0_8_2.chunking import chunk_markdown
+from poe_lastz_v0_8_2.context_blocks import render_context_block
+from poe_lastz_v0_8_2.entity_index import ENTITY_TYPES, EntityIndex, entity_aliases
+from poe_lastz_v0_8_2.json_records import (
+    iter_records,
+    record_heading,
+    record_name,
+    summarize_record,
+)
+from poe_lastz_v0_8_2.knowledge_item import KnowledgeItem
+from poe_lastz_v0_8_2.lexical_index import BM25Index
+from poe_lastz_v0_8_2.payload_store import PayloadStore
+from poe_lastz_v0_8_2.snapshot import KnowledgeSnapshot
+
+# Worker threads used to read and parse knowledge base files
+KB_LOAD_WORKERS = int(os.environ.get("KB_LOAD_WORKERS", "8"))
+
+# Load task kinds whose files are parsed as JSON
+JSON_TASK_KINDS = ("json_dir", "json_file")
+
+# Keep item payloads on disk instead of in memory
+KB_LAZY_PAYLOADS = os.environ.get("KB_LAZY_PAYLOADS", "1").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+PAYLOAD_FILE_PREFIX = "kb_payloads"
+
+# Start a fresh payload file once superseded payloads are this share of it
+PAYLOAD_COMPACT_RATIO = float(os.environ.get("PAYLOAD_COMPACT_RATIO", "0.5"))
+
+# Directory for payload files (the server points it at its cache directory;
+# None = the system temp directory, never the data checkout)
+state_dir = None
+
+# Published retrieval state (items + indexes); replaced, never mutated
+snapshot = KnowledgeSnapshot()
+
+# Items being built by the current load (processors append here)
+_staged_items = []
+
+# path -> {"mtime_ns", "size", "sha256"} of every file behind the last load
+file_manifest = {}
+
+# path -> mtime/size of files that failed to load (so polling doesn't re-flag them)
+_failed_files = {}
+
+# path -> the knowledge items built from that file (reused on incremental loads)
+_file_items = {}
+_loaded_data_path = None
+
+# Store holding the payloads of the last load's items (None if resident)
+payload_store = None
+
+# Returned by _read_file for files that match the manifest
+_UNCHANGED = object()
+
+# Loads share the staging list and manifest, so only one runs at a time
+_load_lock = threading.Lock()
+
+
+def load_knowledge_base(incremental=False, changed_paths=None):
+    """Load comprehensive knowledge base from data directory (Render compatible)
+
+    With ``incremental=True`` only files that were added or changed since the
+    last load are re-parsed; items from unchanged files are reused. If the
+    caller already knows which files changed (``changed_paths``, e.g. from a
+    git diff), every other previously loaded file is reused without a stat.
+    Paths are compared with symlinks resolved.
+
+    Returns ``(staged, delta)``: an unpublished KnowledgeSnapshot (no vectors
+    yet, see ``publish_snapshot``) and the per-file delta with phase timings.
+    """
+    with _load_lock:
+        return _load_knowledge_base(incremental, changed_paths)
+
+
+def publish_snapshot(new_snapshot):
+    """Make a fully built snapshot the one every new request reads"""
+    global snapshot
+    snapshot = replace(
+        new_snapshot, version=snapshot.version + 1, published_at=time.time()
+    )
+    print(
+        f"📸 Published knowledge snapshot v{snapshot.version}: "
+        f"{len(snapshot.items)} items, {len(snapshot.vector_index)} vectors"
+    )
+    return snapshot
 
-# Global knowledge items list
-knowledge_items = []
-
-
-def load_knowledge_base():
-    """Load comprehensive knowledge base from data directory (Render compatible)"""
-    global knowledge_items
-    knowledge_items = []
-
-    # Track statistics for debugging
-    stats = {
-        "json_attempted": 0,
-        "json_loaded": 0,
-        "json_skipped": 0,
-        "md_attempted": 0,
-        "md_loaded": 0,
-        "md_skipped": 0,
-        "errors": [],
-    }
 
-    # Determine data path - try multiple locations for Render compatibility
-    data_path_options = [
-        "/mnt/data/lastz-rag/data",  # Render Disk mount point (PRODUCTION)
-        "../lastz-rag/data",  # Relative path if deployed with repo
-        "/app/lastz-rag/data",  # Absolute path on Render (legacy)
-        "./data",  # Local development
-        os.path.join(
-            os.path.dirname(__file__), "..", "lastz-rag", "data"
-        ),  # Relative from script location
-    ]
+def _load_knowledge_base(incremental, changed_paths):
+    global _staged_items, file_manifest, _failed_files, _file_items, _loaded_data_path
 
-    data_path = None
-    for path in data_path_options:
-        if os.path.exists(path):
-            data_path = path
-            print(f"✅ Found data directory: {path}")
-            break
-
-    if not data_path:
-        print("❌ FATAL ERROR: Data directory not found!")
-        print("❌ Searched paths:")
-        for path in data_path_options:
-            print(f"   - {path}")
-        print("❌ Deployment failed - knowledge base required for operation")
-        raise RuntimeError(
-            "Knowledge base data directory not found. Cannot start bot without data."
-        )
+    stats = _new_stats()
+    data_path = find_data_path()
 
     print(f"📚 Loading knowledge base from: {data_path}")
+    timings = {}
 
-    # Load data_index.md configuration
-    data_index_path = os.path.join(data_path, "data_index.md")
-    if os.path.exists(data_index_path):
-        _load_from_data_index(data_path, data_index_path, stats)
+    # Discover: list every file to load (data_index.md config or legacy layout)
+    phase_start = time.perf_counter()
+    tasks = _plan_tasks(data_path, stats)
+    timings["discover"] = time.perf_counter() - phase_start
+
+    # Files unchanged since the last load keep their items
+    if incremental and data_path == _loaded_data_path:
+        previous, previous_items = file_manifest, _file_items
     else:
-        print("⚠️ data_index.md not found, using legacy loading")
-        _load_legacy_hardcoded(data_path, stats)
+        previous, previous_items = {}, {}
+    if previous and changed_paths is not None:
+        changed = {os.path.realpath(path) for path in changed_paths}
+        tasks_to_read = [
+            task
+            for task in tasks
+            if task[3] not in previous or os.path.realpath(task[3]) in changed
+        ]
+    else:
+        tasks_to_read = tasks
+
+    # Read + parse in parallel (I/O bound on the Render disk)
+    phase_start = time.perf_counter()
+    read_results = dict(
+        zip(
+            (task[3] for task in tasks_to_read),
+            _read_files(tasks_to_read, previous),
+            strict=True,
+        )
+    )
+    results = [
+        read_results.get(task[3]) or (_UNCHANGED, previous[task[3]], None)
+        for task in tasks
+    ]
+    timings["read/parse"] = time.perf_counter() - phase_start
+
+    # Build items in task order so item indices are deterministic
+    phase_start = time.perf_counter()
+    _staged_items = []
+    manifest = {}
+    file_items = {}
+    delta = {"added": [], "changed": [], "deleted": [], "unchanged": 0}
+    failed = {}
+    for task, (payload, entry, error) in zip(tasks, results, strict=True):
+        path = task[3]
+        start = len(_staged_items)
+        if payload is _UNCHANGED:
+            _staged_items.extend(previous_items[path])
+            stats["unchanged"] += 1
+            stats["json_loaded" if task[0] in JSON_TASK_KINDS else "md_loaded"] += 1
+            delta["unchanged"] += 1
+            loaded = True
+        else:
+            loaded = _process_file(task, payload, error, stats)
+            if loaded:
+                change = "changed" if path in previous else "added"
+                delta[change].append(os.path.relpath(path, data_path))
+        # Failed files stay out of the manifest so the next load retries them
+        if entry is not None:
+            (manifest if loaded else failed)[path] = entry
+        file_items[path] = _staged_items[start:]
+    task_paths = {task[3] for task in tasks}
+    delta["deleted"] = [
+        os.path.relpath(path, data_path) for path in previous if path not in task_paths
+    ]
+    file_manifest, _failed_files = manifest, failed
+    _file_items, _loaded_data_path = file_items, data_path
+    timings["process"] = time.perf_counter() - phase_start
+
+    # Pre-render new items' LLM context blocks (requests just concatenate them)
+    # and note entity aliases, so index builds never read offloaded payloads
+    phase_start = time.perf_counter()
+    items = tuple(_staged_items)
+    _staged_items = []
+    for item in items:
+        if item.payload_store is None and item.context_block is None:
+            item.set_context_block(render_context_block(item))
+            if item.type in ENTITY_TYPES:
+                item.aliases = entity_aliases(item.data)
+    timings["render"] = time.perf_counter() - phase_start
+
+    # Move new items' payloads to disk: search only needs text and vectors
+    if KB_LAZY_PAYLOADS:
+        phase_start = time.perf_counter()
+        offloaded = _offload_payloads(items, fresh=not previous)
+        if offloaded is not items:
+            # Compacted: the snapshot and later reloads use the copies
+            counts = [
+                (path, len(file_items)) for path, file_items in _file_items.items()
+            ]
+            items, _file_items = offloaded, _group_by_file(offloaded, counts)
+        timings["offload"] = time.perf_counter() - phase_start
+
+    # Build local lookup indexes over the loaded items
+    phase_start = time.perf_counter()
+    staged = KnowledgeSnapshot(
+        items=items,
+        entity_index=EntityIndex.build(items),
+        lexical_index=BM25Index.build(items),
+    )
+    timings["index"] = time.perf_counter() - phase_start
 
     # Print detailed statistics
     print(f"\n{'=' * 60}")
     print("📊 KNOWLEDGE BASE LOADING SUMMARY")
     print(f"{'=' * 60}")
-    print(f"✅ Total items loaded: {len(knowledge_items)}")
+    print(f"✅ Total items loaded: {len(items)}")
+    print(f"🎯 Entity names indexed: {len(staged.entity_index)}")
+    print(f"🔤 Lexical (BM25) index: {len(staged.lexical_index)} items")
+    phases = ", ".join(f"{name} {secs:.2f}s" for name, secs in timings.items())
+    print(
+        f"⏱️ Load phases ({len(tasks_to_read)}/{len(tasks)} files read, "
+        f"{KB_LOAD_WORKERS} workers): {phases}"
+    )
+    if previous:
+        print(
+            f"🔁 Incremental reload: {len(delta['added'])} added, "
+            f"{len(delta['changed'])} changed, {len(delta['deleted'])} deleted, "
+            f"{delta['unchanged']} unchanged"
+        )
     print("\n📄 JSON Files:")
     print(f"   Attempted: {stats['json_attempted']}")
     print(f"   Loaded: {stats['json_loaded']}")
     print(f"   Skipped: {stats['json_skipped']}")
+    print(f"   Records indexed: {stats['json_records']}")
     print("\n📝 Markdown Files:")
     print(f"   Attempted: {stats['md_attempted']}")
     print(f"   Loaded: {stats['md_loaded']}")
     print(f"   Skipped: {stats['md_skipped']}")
+    print(f"   Chunks indexed: {stats['md_chunks']}")
     if stats["errors"]:
         print(f"\n❌ Errors ({len(stats['errors'])}):")
         for error in stats["errors"][:10]:  # Show first 10 errors
@@ -82,8 +246,195 @@ def load_knowledge_base():
             print(f"   ... and {len(stats['errors']) - 10} more errors")
     print(f"{'=' * 60}\n")
 
+    delta["timings"] = {name: round(secs, 4) for name, secs in timings.items()}
+    delta["errors"] = stats["errors"]
+    return staged, delta
+
+
+def detect_changes():
+    """Paths added, modified or deleted since the last load (mtime/size only)
+
+    Nothing is read or parsed, so this is cheap enough to poll. Returns
+    absolute paths, or None if nothing has been loaded yet.
+    """
+    if _loaded_data_path is None:
+        return None
+    tasks = _plan_tasks(_loaded_data_path, _new_stats(), verbose=False)
+    changed = []
+    for task in tasks:
+        path = task[3]
+        entry = file_manifest.get(path) or _failed_files.get(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            if entry is not None:
+                changed.append(path)
+            continue
+        if (
+            entry is None
+            or entry["mtime_ns"] != stat.st_mtime_ns
+            or entry["size"] != stat.st_size
+        ):
+            changed.append(path)
+    task_paths = {task[3] for task in tasks}
+    changed += [path for path in file_manifest if path not in task_paths]
+    return [os.path.abspath(path) for path in changed]
+
+
+def watch_roots():
+    """Fewest directories covering the data directory and every planned file
+
+    Markdown directories may sit outside the data directory (``data/..``), so
+    watching the data directory alone would miss them.
+    """
+    data_path = _loaded_data_path or find_data_path()
+    tasks = _plan_tasks(data_path, _new_stats(), verbose=False)
+    dirs = {os.path.realpath(data_path)}
+    dirs.update(os.path.dirname(os.path.realpath(task[3])) for task in tasks)
+    roots = []
+    for path in sorted(dirs):
+        if not any(os.path.commonpath([path, root]) == root for root in roots):
+            roots.append(path)
+    return roots
+
+
+def is_data_within(repo_path):
+    """Whether the loaded data directory lies inside repo_path (symlinks resolved)
+
+    Only then can paths from a git diff of repo_path match loaded files.
+    """
+    if _loaded_data_path is None:
+        return False
+    data_path = os.path.realpath(_loaded_data_path)
+    repo_path = os.path.realpath(repo_path)
+    return os.path.commonpath([data_path, repo_path]) == repo_path
+
+
+def export_state(items):
+    """Loader state behind ``items`` (the last load), for a compiled bundle
+
+    Returns None if ``items`` isn't the result of the last load.
+    """
+    files = [(path, len(file_items)) for path, file_items in _file_items.items()]
+    if _loaded_data_path is None or sum(count for _, count in files) != len(items):
+        return None
+    return {
+        "data_path": os.path.abspath(_loaded_data_path),
+        "manifest": dict(file_manifest),
+        "failed": dict(_failed_files),
+        "files": files,
+    }
+
+
+def restore_state(items, state):
+    """Adopt the loader state saved with a compiled bundle's ``items``
+
+    Returns the paths changed on disk since the bundle was compiled (an empty
+    list if it is current), or None if it was built from another data directory.
+    """
+    global file_manifest, _failed_files, _file_items, _loaded_data_path, payload_store
+
+    with _load_lock:
+        data_path = find_data_path()
+        if os.path.abspath(data_path) != state["data_path"]:
+            return None
+        file_items = _group_by_file(items, state["files"])
+        file_manifest = dict(state["manifest"])
+        _failed_files = dict(state["failed"])
+        _file_items, _loaded_data_path = file_items, data_path
+        payload_store = next(
+            (item.payload_store for item in items if item.payload_store), None
+        )
+    return detect_changes()
+
+
+def _group_by_file(items, counts):
+    """path -> its items, from items in file order and (path, count) pairs"""
+    file_items = {}
+    start = 0
+    for path, count in counts:
+        file_items[path] = list(items[start : start + count])
+        start += count
+    return file_items
+
+
+def find_data_path():
+    """Locate the data directory - tries multiple locations for Render compatibility"""
+    data_path_options = [
+        "/mnt/data/lastz-rag/data",  # Render Disk mount point (PRODUCTION)
+        "../lastz-rag/data",  # Relative path if deployed with repo
+        "/app/lastz-rag/data",  # Absolute path on Render (legacy)
+        "./data",  # Local development
+        os.path.join(
+            os.path.dirname(__file__), "..", "lastz-rag", "data"
+        ),  # Relative from script location
+    ]
+
+    for path in data_path_options:
+        if os.path.exists(path):
+            print(f"✅ Found data directory: {path}")
+            return path
 
-def _parse_data_index(data_index_path):
+    print("❌ FATAL ERROR: Data directory not found!")
+    print("❌ Searched paths:")
+    for path in data_path_options:
+        print(f"   - {path}")
+    print("❌ Deployment failed - knowledge base required for operation")
+    raise RuntimeError(
+        "Knowledge base data directory not found. Cannot start bot without data."
+    )
+
+
+def _new_stats():
+    """Counters reported in the load summary"""
+    return {
+        "json_attempted": 0,
+        "json_loaded": 0,
+        "json_skipped": 0,
+        "json_records": 0,
+        "md_attempted": 0,
+        "md_loaded": 0,
+        "md_skipped": 0,
+        "md_chunks": 0,
+        "unchanged": 0,
+        "errors": [],
+    }
+
+
+def _plan_tasks(data_path, stats, verbose=True):
+    """List every file to load (data_index.md config, else the legacy layout)"""
+    tasks = None
+    data_index_path = os.path.join(data_path, "data_index.md")
+    if os.path.exists(data_index_path):
+        tasks = _plan_from_data_index(data_path, data_index_path, stats, verbose)
+        if tasks is None and verbose:
+            print("⚠️ Failed to parse data_index.md, falling back to legacy loading")
+    elif verbose:
+        print("⚠️ data_index.md not found, using legacy loading")
+    if tasks is None:
+        tasks = _plan_legacy_hardcoded(data_path, stats, verbose)
+    return tasks
+
+
+def find_entities(text, snap=None):
+    """Find hero/building/research/equipment items named (or aliased) in the text
+
+    ``item_index`` values point into ``snap.items`` (default: the published
+    snapshot), so callers should keep using that same snapshot.
+    """
+    snap = snap if snap is not None else snapshot
+    matches = snap.entity_index.find(text)
+    for match in matches:
+        match["name"] = snap.items[match["item_index"]].name
+        if match["distance"]:
+            print(
+                f"🔤 Fuzzy entity match: '{match['span']}' → {match['name']} "
+                f"(distance {match['distance']})"
+            )
+    return matches
+
+
+def _parse_data_index(data_index_path, verbose=True):
     """Parse data_index.md to get loading configuration"""
     try:
         with open(data_index_path, encoding="utf-8") as f:
@@ -139,11 +490,12 @@ def _parse_data_index(data_index_path):
                     config["dynamic_markdown_dirs"].append(parts[1].rstrip("/"))
 
         # Debug logging
-        print("🔍 Parsed data_index.md:")
-        print(f"   Core static files: {len(config['core_static'])}")
-        print(f"   JSON directories: {config['dynamic_json_dirs']}")
-        print(f"   JSON files: {len(config['dynamic_json_files'])}")
-        print(f"   Markdown directories: {config['dynamic_markdown_dirs']}")
+        if verbose:
+            print("🔍 Parsed data_index.md:")
+            print(f"   Core static files: {len(config['core_static'])}")
+            print(f"   JSON directories: {config['dynamic_json_dirs']}")
+            print(f"   JSON files: {len(config['dynamic_json_files'])}")
+            print(f"   Markdown directories: {config['dynamic_markdown_dirs']}")
 
         return config
     except Exception as e:
@@ -151,82 +503,43 @@ def _parse_data_index(data_index_path):
         return None
 
 
-def _load_from_data_index(data_path, data_index_path, stats):
-    """Load data based on data_index.md configuration"""
-    config = _parse_data_index(data_index_path)
+def _plan_from_data_index(data_path, data_index_path, stats, verbose=True):
+    """List the files named by data_index.md, or None if it can't be parsed"""
+    config = _parse_data_index(data_index_path, verbose)
     if not config:
-        print("⚠️ Failed to parse data_index.md, falling back to legacy loading")
-        _load_legacy_hardcoded(data_path, stats)
-        return
+        return None
 
-    print("📋 Parsed data_index.md configuration")
+    if verbose:
+        print("📋 Parsed data_index.md configuration")
+    tasks = []
 
-    # Load core static markdown files
+    # Core static markdown files
     for file_path in config["core_static"]:
-        full_path = os.path.join(data_path, file_path)
         stats["md_attempted"] += 1
-        if os.path.exists(full_path):
-            try:
-                with open(full_path, encoding="utf-8") as f:
-                    content = f.read()
-
-                filename = os.path.basename(file_path)
-                searchable_text = f"Core Guide: {filename.replace('.md', '').replace('_', ' ').title()} "
-                searchable_text += f"Content: {content[:500]}..."
-
-                knowledge_items.append(
-                    {
-                        "type": "core_guide",
-                        "name": filename.replace(".md", "").replace("_", " ").title(),
-                        "text": searchable_text,
-                        "data": {"filename": filename, "content": content},
-                    }
-                )
-                stats["md_loaded"] += 1
-                print(f"✅ Loaded core guide: {filename}")
-            except Exception as e:
-                stats["md_skipped"] += 1
-                stats["errors"].append(f"core/{filename}: {str(e)}")
-                print(f"❌ Error loading {file_path}: {e}")
-        else:
-            stats["md_skipped"] += 1
-            stats["errors"].append(f"core/{file_path}: File not found")
+        full_path = os.path.normpath(os.path.join(data_path, file_path))
+        tasks.append(("core", "core", file_path, full_path))
 
-    # Load JSON directories
+    # JSON directories
     for dir_name in config["dynamic_json_dirs"]:
         dir_path = os.path.join(data_path, dir_name)
-        print(f"🔍 Looking for JSON directory: {dir_path}")
-        if os.path.exists(dir_path):
-            print(f"✅ Found directory: {dir_name}, loading...")
-            _load_json_directory(dir_path, dir_name, stats)
+        if os.path.isdir(dir_path):
+            for filename, full_path in _scan_directory(dir_path, ".json", stats):
+                stats["json_attempted"] += 1
+                tasks.append(("json_dir", dir_name, filename, full_path))
         else:
-            print(f"⚠️ Directory not found: {dir_path}")
+            if verbose:
+                print(f"⚠️ Directory not found: {dir_path}")
             stats["errors"].append(
                 f"JSON directory '{dir_name}' not found at {dir_path}"
             )
 
-    # Load individual JSON files
+    # Individual JSON files
     for file_path in config["dynamic_json_files"]:
-        full_path = os.path.join(data_path, file_path)
         stats["json_attempted"] += 1
-        if os.path.exists(full_path):
-            try:
-                with open(full_path, encoding="utf-8") as f:
-                    data = json.load(f)
-
-                filename = os.path.basename(file_path)
-                _process_json_file(filename, data)
-                stats["json_loaded"] += 1
-                print(f"✅ Loaded JSON file: {filename}")
-            except Exception as e:
-                stats["json_skipped"] += 1
-                stats["errors"].append(f"{file_path}: {str(e)}")
-                print(f"❌ Error loading {file_path}: {e}")
-        else:
-            stats["json_skipped"] += 1
-            stats["errors"].append(f"{file_path}: File not found")
+        full_path = os.path.normpath(os.path.join(data_path, file_path))
+        tasks.append(("json_file", "", file_path, full_path))
 
-    # Load markdown directories
+    # Markdown directories
     for dir_name in config["dynamic_markdown_dirs"]:
         # Check both relative to data_path and absolute
         possible_paths = [
@@ -235,84 +548,238 @@ def _load_from_data_index(data_path, data_index_path, stats):
             os.path.join(os.path.dirname(data_path), dir_name),
         ]
 
-        found = False
         for dir_path in possible_paths:
-            if os.path.exists(dir_path):
-                print(f"✅ Found markdown directory: {dir_name} at {dir_path}")
-                _load_markdown_directory(dir_path, dir_name, stats)
-                found = True
+            if os.path.isdir(dir_path):
+                for filename, full_path in _scan_directory(dir_path, ".md", stats):
+                    stats["md_attempted"] += 1
+                    tasks.append(("markdown_dir", dir_name, filename, full_path))
                 break
-
-        if not found:
-            print(f"⚠️ Markdown directory not found: {dir_name}")
+        else:
+            if verbose:
+                print(f"⚠️ Markdown directory not found: {dir_name}")
             stats["errors"].append(
                 f"Markdown directory '{dir_name}' not found in any search path"
             )
 
+    return tasks
 
-def _load_json_directory(dir_path, dir_name, stats):
-    """Load all JSON files from a directory"""
+
+def _scan_directory(dir_path, extension, stats):
+    """Sorted (filename, path) pairs of the files in a directory with an extension"""
     try:
-        for filename in os.listdir(dir_path):
-            if filename.endswith(".json"):
-                stats["json_attempted"] += 1
-                try:
-                    with open(os.path.join(dir_path, filename), encoding="utf-8") as f:
-                        data = json.load(f)
-
-                    # Process based on directory type
-                    if dir_name == "heroes":
-                        _process_hero_file(filename, data)
-                    elif dir_name == "research":
-                        _process_research_file(filename, data)
-                    else:
-                        _process_generic_json(filename, data, dir_name)
-                    stats["json_loaded"] += 1
-                except Exception as e:
-                    stats["json_skipped"] += 1
-                    stats["errors"].append(f"{dir_name}/{filename}: {str(e)}")
-                    print(f"❌ Error loading {dir_name}/{filename}: {e}")
-    except Exception as e:
+        with os.scandir(dir_path) as entries:
+            files = [
+                (entry.name, os.path.normpath(entry.path))
+                for entry in entries
+                if entry.name.endswith(extension) and entry.is_file()
+            ]
+    except OSError as e:
         stats["errors"].append(f"Reading directory {dir_path}: {str(e)}")
         print(f"❌ Error reading directory {dir_path}: {e}")
+        return []
+    return sorted(files)
+
 
+def _read_file(task, previous=None):
+    """Read (and for JSON, parse) one file unless it matches its manifest entry
 
-def _load_markdown_directory(dir_path, dir_name, stats):
-    """Load all markdown files from a directory"""
+    Returns (payload, manifest entry, error); payload is ``_UNCHANGED`` when
+    the file's mtime/size or content hash equals ``previous``.
+    """
+    kind, _, _, full_path = task
     try:
-        for filename in os.listdir(dir_path):
-            if filename.endswith(".md"):
-                stats["md_attempted"] += 1
-                try:
-                    with open(os.path.join(dir_path, filename), encoding="utf-8") as f:
-                        content = f.read()
-
-                    searchable_text = f"{dir_name.upper()} Article: {filename.replace('.md', '').replace('_', ' ').title()} "
-                    searchable_text += f"Content: {content[:500]}..."
-
-                    knowledge_items.append(
-                        {
-                            "type": f"{dir_name}_article",
-                            "name": filename.replace(".md", "")
-                            .replace("_", " ")
-                            .title(),
-                            "text": searchable_text,
-                            "data": {
-                                "filename": filename,
-                                "content": content,
-                                "directory": dir_name,
-                            },
-                        }
-                    )
-                    stats["md_loaded"] += 1
-                    print(f"✅ Loaded {dir_name} article: {filename}")
-                except Exception as e:
-                    stats["md_skipped"] += 1
-                    stats["errors"].append(f"{dir_name}/{filename}: {str(e)}")
-                    print(f"❌ Error loading {dir_name}/{filename}: {e}")
+        stat = os.stat(full_path)
+        if (
+            previous
+            and previous["mtime_ns"] == stat.st_mtime_ns
+            and previous["size"] == stat.st_size
+        ):
+            return _UNCHANGED, previous, None
+
+        with open(full_path, "rb") as f:
+            raw = f.read()
+        entry = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": hashlib.sha256(raw).hexdigest(),
+        }
+        if previous and previous["sha256"] == entry["sha256"]:
+            return _UNCHANGED, entry, None
     except Exception as e:
-        stats["errors"].append(f"Reading directory {dir_path}: {str(e)}")
-        print(f"❌ Error reading directory {dir_path}: {e}")
+        return None, None, e
+
+    try:
+        text = raw.decode("utf-8").replace("\r\n", "\n")
+        if kind in JSON_TASK_KINDS:
+            return json.loads(text), entry, None
+        return text, entry, None
+    except Exception as e:
+        return None, entry, e
+
+
+def _read_files(tasks, previous):
+    """Read and parse files on a thread pool, returning results in task order"""
+    if not tasks:
+        return []
+    workers = max(1, min(KB_LOAD_WORKERS, len(tasks)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(_read_file, tasks, [previous.get(task[3]) for task in tasks])
+        )
+
+
+def _state_dir():
+    """Directory for loader state (payload files)"""
+    return state_dir or tempfile.gettempdir()
+
+
+def _offload_payloads(items, fresh):
+    """Move resident item payloads into the payload store (best effort)
+
+    A full load starts a new store file and removes older ones (snapshots
+    still reading them keep their open handle); incremental loads append.
+    Once superseded payloads pass PAYLOAD_COMPACT_RATIO of the file, the live
+    ones are copied to a fresh file. That needs new item objects (the
+    published snapshot keeps reading the old ones), so the items to use are
+    returned: ``items`` itself unless compacted.
+    """
+    global payload_store
+
+    compact = False
+    if not fresh and payload_store is not None and payload_store.size:
+        live = sum(
+            item.payload_size for item in items if item.payload_store is payload_store
+        )
+        garbage = payload_store.size - live
+        if garbage / payload_store.size > PAYLOAD_COMPACT_RATIO:
+            print(
+                f"🧹 Compacting item payloads: {garbage / (1024 * 1024):.2f} of "
+                f"{payload_store.size / (1024 * 1024):.2f} MB superseded"
+            )
+            compact = True
+
+    try:
+        if compact:
+            items = tuple(
+                item.detached() if item.payload_store is not None else item
+                for item in items
+            )
+        resident = [item for item in items if item.payload_store is None]
+        if not resident:
+            return items
+        if fresh or compact or payload_store is None:
+            payload_store = _new_payload_store()
+        locations = payload_store.put_many([item.payload() for item in resident])
+    except OSError as e:
+        print(f"⚠️ Could not write item payloads, keeping them in memory: {e}")
+        return items
+    for item, (offset, length) in zip(resident, locations, strict=True):
+        item.attach_payload(payload_store, offset, length)
+    print(f"💾 Moved {len(resident)} item payloads to {payload_store.path}")
+    return items
+
+
+def _new_payload_store():
+    base_dir = _state_dir()
+    filename = f"{PAYLOAD_FILE_PREFIX}.{uuid.uuid4().hex[:8]}.bin"
+    store = PayloadStore.create(os.path.join(base_dir, filename))
+    for entry in os.scandir(base_dir):
+        if entry.name.startswith(f"{PAYLOAD_FILE_PREFIX}.") and entry.name != filename:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    return store
+
+
+def _process_file(task, payload, error, stats):
+    """Turn one loaded file into knowledge items; returns True on success"""
+    kind, dir_name, name, _ = task
+    prefix = "json" if kind in JSON_TASK_KINDS else "md"
+    label = f"{dir_name}/{name}" if kind in ("json_dir", "markdown_dir") else name
+
+    if error is None:
+        try:
+            if kind == "core":
+                stats["md_chunks"] += _add_markdown_chunks(
+                    payload, os.path.basename(name), "core_guide", "Core Guide"
+                )
+            elif kind == "markdown_dir":
+                stats["md_chunks"] += _add_markdown_chunks(
+                    payload,
+                    name,
+                    f"{dir_name}_article",
+                    f"{dir_name.upper()} Article",
+                    directory=dir_name,
+                )
+            elif kind == "json_file":
+                stats["json_records"] += _process_json_file(
+                    os.path.basename(name), payload
+                )
+            elif dir_name == "heroes":
+                _process_hero_file(name, payload)
+            elif dir_name == "research":
+                _process_research_file(name, payload)
+            else:
+                stats["json_records"] += _process_generic_json(name, payload, dir_name)
+        except Exception as e:
+            error = e
+
+    if error is None:
+        stats[f"{prefix}_loaded"] += 1
+        return True
+    stats[f"{prefix}_skipped"] += 1
+    if isinstance(error, FileNotFoundError):
+        stats["errors"].append(f"{label}: File not found")
+    else:
+        stats["errors"].append(f"{label}: {str(error)}")
+        print(f"❌ Error loading {label}: {error}")
+    return False
+
+
+def _strip_title(section, title):
+    """Drop a section path's leading heading when it just repeats the title
+
+    Most documents open with an H1 naming the file, which would otherwise
+    turn up twice: "Tips - Tips", "Game Fundamentals - Game Fundamentals > HQ".
+    """
+    first, _, rest = section.partition(" > ")
+    if _title_key(first) == _title_key(title):
+        return rest
+    return section
+
+
+def _title_key(text):
+    return "".join(char for char in text.casefold() if char.isalnum())
+
+
+def _add_markdown_chunks(content, filename, item_type, label, directory=None):
+    """Add one knowledge item per section chunk of a markdown document
+
+    Every chunk keeps a pointer to its parent document (``parent``,
+    ``chunk_index``, ``chunk_count``) so results can be traced back to it.
+    Returns the number of chunks added.
+    """
+    title = filename.replace(".md", "").replace("_", " ").title()
+    chunks = chunk_markdown(content)
+    for chunk_index, (section, chunk) in enumerate(chunks):
+        section = _strip_title(section, title)
+        heading = f"{title} - {section}" if section else title
+        data = {
+            "filename": filename,
+            "parent": title,
+            "section": section,
+            "chunk_index": chunk_index,
+            "chunk_count": len(chunks),
+        }
+        if directory:
+            data["directory"] = directory
+        _staged_items.append(
+            KnowledgeItem.chunk(
+                item_type, heading, f"{label}: {heading} Content: ", chunk, data
+            )
+        )
+    return len(chunks)
 
 
 def _process_hero_file(filename, hero_data):
@@ -337,13 +804,8 @@ def _process_hero_file(filename, hero_data):
     if "description" in hero_data:
         hero_text += f"Description: {hero_data['description']}"
 
-    knowledge_items.append(
-        {
-            "type": "hero",
-            "name": hero_data.get("name", filename),
-            "text": hero_text,
-            "data": hero_data,
-        }
+    _staged_items.append(
+        KnowledgeItem("hero", hero_data.get("name", filename), hero_text, hero_data)
     )
 
 
@@ -353,35 +815,46 @@ def _process_research_file(filename, research_data):
     research_text += f"Category: {research_data.get('category', 'Unknown')} "
     research_text += f"Description: {research_data.get('description', '')}"
 
-    knowledge_items.append(
-        {
-            "type": "research",
-            "name": research_data.get("name", filename),
-            "text": research_text,
-            "data": research_data,
-        }
+    _staged_items.append(
+        KnowledgeItem(
+            "research",
+            research_data.get("name", filename),
+            research_text,
+            research_data,
+        )
     )
 
 
 def _process_generic_json(filename, data, directory):
-    """Process generic JSON files from directories"""
-    content_text = f"{directory.title()} Data: {filename} "
-    content_text += (
-        f"File containing {len(str(data))} characters of {directory} information"
-    )
-
-    knowledge_items.append(
-        {
-            "type": directory,
-            "name": filename.replace(".json", "").replace("_", " ").title(),
-            "text": content_text,
-            "data": data,
-        }
-    )
+    """Process generic JSON files from directories (one item per record)"""
+    return _add_json_records(filename, data, directory, directory.title())
+
+
+def _add_json_records(filename, data, item_type, label):
+    """Add one knowledge item per record in a JSON document
+
+    Returns the number of records added.
+    """
+    title = filename.replace(".json", "").replace("_", " ").title()
+    count = 0
+    for path, record in iter_records(data):
+        count += 1
+        name = record_name(record, path) or f"{title} {count}"
+        heading = record_heading(name, path)
+        _staged_items.append(
+            KnowledgeItem(
+                item_type,
+                name,
+                f"{label} {title}: {heading} - {summarize_record(record)}",
+                record,
+            )
+        )
+    return count
 
 
 def _process_json_file(filename, data):
-    """Process different types of JSON files"""
+    """Process different types of JSON files, returning the number of items added"""
+    count_before = len(_staged_items)
     if filename == "buildings.json" and "buildings" in data:
         for building in data["buildings"]:
             building_text = f"Building: {building.get('name', 'Unknown')} "
@@ -391,13 +864,10 @@ def _process_json_file(filename, data):
                 building_text += f"Produces: {building['produces']} "
             building_text += f"Notes: {building.get('notes', '')}"
 
-            knowledge_items.append(
-                {
-                    "type": "building",
-                    "name": building.get("name", "Unknown"),
-                    "text": building_text,
-                    "data": building,
-                }
+            _staged_items.append(
+                KnowledgeItem(
+                    "building", building.get("name", "Unknown"), building_text, building
+                )
             )
     elif filename == "equipment.json":
         # Handle equipment data
@@ -407,41 +877,28 @@ def _process_json_file(filename, data):
         elif "equipment" in data:
             equipment_items = data["equipment"]
 
-        for item in equipment_items[:20]:  # Limit to avoid overwhelming
+        for item in equipment_items:
             if isinstance(item, dict):
                 item_text = f"Equipment: {item.get('name', 'Unknown')} "
                 item_text += f"Type: {item.get('type', 'Unknown')} "
                 item_text += f"Stats: {item.get('stats', '')} "
 
-                knowledge_items.append(
-                    {
-                        "type": "equipment",
-                        "name": item.get("name", "Unknown"),
-                        "text": item_text,
-                        "data": item,
-                    }
+                _staged_items.append(
+                    KnowledgeItem(
+                        "equipment", item.get("name", "Unknown"), item_text, item
+                    )
                 )
     else:
         # Generic JSON file processing
-        content_text = f"Data from {filename}: "
-        if isinstance(data, dict):
-            content_text += f"Contains keys: {', '.join(list(data.keys())[:10])}"
-        elif isinstance(data, list):
-            content_text += f"Contains {len(data)} items"
-
-        knowledge_items.append(
-            {
-                "type": "data_file",
-                "name": filename.replace(".json", "").replace("_", " ").title(),
-                "text": content_text,
-                "data": data,
-            }
-        )
+        _add_json_records(filename, data, "data_file", "Data from")
+    return len(_staged_items) - count_before
 
 
-def _load_legacy_hardcoded(data_path, stats):
-    """Fallback to hardcoded loading if data_index.md fails"""
-    print("🔄 Using legacy hardcoded data loading...")
+def _plan_legacy_hardcoded(data_path, stats, verbose=True):
+    """Fallback file list if data_index.md is missing or can't be parsed"""
+    if verbose:
+        print("🔄 Using legacy hardcoded data loading...")
+    tasks = []
 
     # Legacy core files
     core_files = [
@@ -452,33 +909,19 @@ def _load_legacy_hardcoded(data_path, stats):
     ]
     core_path = os.path.join(data_path, "core")
 
-    if os.path.exists(core_path):
-        for filename in core_files:
-            filepath = os.path.join(core_path, filename)
-            if os.path.exists(filepath):
-                try:
-                    with open(filepath, encoding="utf-8") as f:
-                        content = f.read()
-
-                    searchable_text = f"Core Guide: {filename.replace('.md', '').replace('_', ' ').title()} "
-                    searchable_text += f"Content: {content[:500]}..."
-
-                    knowledge_items.append(
-                        {
-                            "type": "core_guide",
-                            "name": filename.replace(".md", "")
-                            .replace("_", " ")
-                            .title(),
-                            "text": searchable_text,
-                            "data": {"filename": filename, "content": content},
-                        }
-                    )
-                    print(f"✅ Loaded legacy core guide: {filename}")
-                except Exception as e:
-                    print(f"❌ Error loading {filename}: {e}")
+    for filename in core_files:
+        filepath = os.path.join(core_path, filename)
+        if os.path.exists(filepath):
+            stats["md_attempted"] += 1
+            tasks.append(
+                ("core", "core", f"core/{filename}", os.path.normpath(filepath))
+            )
 
     # Legacy directory scans
     for directory in ["heroes", "research"]:
         dir_path = os.path.join(data_path, directory)
-        if os.path.exists(dir_path):
-            _load_json_directory(dir_path, directory, stats)
+        if os.path.isdir(dir_path):
+            for filename, full_path in _scan_directory(dir_path, ".json", stats):
+                stats["json_attempted"] += 1
+                tasks.append(("json_dir", directory, filename, full_path))
+    return tasks
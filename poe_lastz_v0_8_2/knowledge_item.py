@@ -0,0 +1,110 @@
+"""
+Knowledge items for Last Z Bot
+Compact __slots__ record for one searchable unit (a hero, a JSON record, a
+markdown chunk); an item's id is its position in the snapshot's items tuple
+"""
+
+from __future__ import annotations
+
+import sys
+
+
+class KnowledgeItem:
+    """One searchable unit of the knowledge base
+
+    ``text`` is what gets embedded and indexed, ``data`` the structured
+    payload handed to the LLM. A markdown chunk is stored once, as the tail
+    of ``text`` from ``content_start`` on (see ``content``), not copied into
+    ``data``. Type strings are interned so every item of a type shares one.
+    ``context_block`` is the item's pre-rendered prompt text, ``aliases`` the
+    alternative names of an entity item (kept resident for index builds).
+
+    Once moved to a PayloadStore (``attach_payload``) the item keeps only the
+    location of its [data, context block] payload, read back on demand.
+    """
+
+    __slots__ = (
+        "type",
+        "name",
+        "text",
+        "content_start",
+        "aliases",
+        "_data",
+        "_context",
+        "_store",
+        "_offset",
+        "_length",
+    )
+
+    def __init__(
+        self, item_type: str, name: str, text: str, data, content_start: int = -1
+    ):
+        self.type = sys.intern(item_type)
+        self.name = name
+        self.text = text
+        self.content_start = content_start
+        self.aliases = ()
+        self._data = data
+        self._context = None
+        self._store = None
+        self._offset = 0
+        self._length = 0
+
+    @classmethod
+    def chunk(cls, item_type: str, name: str, prefix: str, chunk: str, data):
+        """Item for a markdown chunk: ``text`` is prefix + chunk"""
+        return cls(item_type, name, prefix + chunk, data, len(prefix))
+
+    @property
+    def data(self):
+        if self._store is None:
+            return self._data
+        return self._store.get(self._offset, self._length)[0]
+
+    @property
+    def context_block(self) -> str | None:
+        if self._store is None:
+            return self._context
+        return self._store.get(self._offset, self._length)[1]
+
+    def set_context_block(self, block: str) -> None:
+        self._context = block
+
+    def payload(self) -> list:
+        """What attach_payload moves out of memory: [data, context block]"""
+        return [self._data, self._context]
+
+    @property
+    def payload_store(self):
+        """The PayloadStore holding this item's data (None while resident)"""
+        return self._store
+
+    @property
+    def payload_size(self) -> int:
+        """Bytes this item's payload takes in its store (0 while resident)"""
+        return self._length
+
+    def detached(self) -> KnowledgeItem:
+        """Resident copy of an offloaded item (this one keeps its location)"""
+        item = KnowledgeItem(self.type, self.name, self.text, None, self.content_start)
+        item.aliases = self.aliases
+        item._data, item._context = self._store.read(self._offset, self._length)
+        return item
+
+    def attach_payload(self, store, offset: int, length: int) -> None:
+        """Drop the resident data; it now lives at (offset, length) in store"""
+        self._store = store
+        self._offset = offset
+        self._length = length
+        self._data = None
+        self._context = None
+
+    @property
+    def content(self) -> str | None:
+        """The markdown chunk (sliced from ``text``), or None for other items"""
+        if self.content_start < 0:
+            return None
+        return self.text[self.content_start :]
+
+    def __repr__(self) -> str:
+        return f"KnowledgeItem({self.type!r}, {self.name!r})"
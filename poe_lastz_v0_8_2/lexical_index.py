@@ -0,0 +1,106 @@
+"""
+Lexical (BM25) index for Last Z Bot
+Keyword retrieval that needs no API call, plus reciprocal-rank fusion
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter
+
+from poe_lastz_v0_8_2.text_utils import STOPWORDS, tokenize
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal-rank fusion constant (60 is the usual choice)
+RRF_K = 60
+
+
+def index_terms(text: str) -> list[str]:
+    """Tokens that take part in lexical matching (stopwords removed)"""
+    return [token for token in tokenize(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with precomputed per-posting BM25 weights
+
+    Scoring a query is just summing the stored weights of its terms'
+    postings, so cost depends on how common the query terms are, not on the
+    size of the knowledge base.
+    """
+
+    def __init__(self):
+        self.postings: dict[str, list[tuple[int, float]]] = {}
+        self.idf: dict[str, float] = {}
+        self.doc_count = 0
+
+    @classmethod
+    def build(cls, items) -> BM25Index:
+        index = cls()
+        doc_terms = []
+        for idx, item in enumerate(items):
+            terms = Counter(index_terms(item.text))
+            if terms:
+                doc_terms.append((idx, terms, sum(terms.values())))
+
+        index.doc_count = len(doc_terms)
+        if not doc_terms:
+            return index
+        avg_length = sum(length for _, _, length in doc_terms) / len(doc_terms)
+
+        doc_freq = Counter()
+        for _, terms, _ in doc_terms:
+            doc_freq.update(terms.keys())
+        for term, freq in doc_freq.items():
+            index.idf[term] = math.log(
+                1 + (index.doc_count - freq + 0.5) / (freq + 0.5)
+            )
+
+        for idx, terms, length in doc_terms:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            for term, tf in terms.items():
+                weight = index.idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+                index.postings.setdefault(term, []).append((idx, weight))
+        return index
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    def search(self, query: str, top_k: int = 50) -> list[tuple[int, float, float]]:
+        """Return (item_index, bm25_score, coverage) for the best matches
+
+        ``coverage`` is the idf-weighted share of the query terms the item
+        contains (0-1). It is not a similarity: an item holding the query's
+        rarest term scores high whatever it is about. Terms missing from the
+        index count as maximally rare.
+        """
+        terms = set(index_terms(query))
+        unseen_idf = math.log(1 + (self.doc_count + 0.5) / 0.5)
+        query_idf = sum(self.idf.get(term, unseen_idf) for term in terms)
+        if not self.doc_count or not query_idf:
+            return []
+
+        scores: dict[int, float] = {}
+        matched_idf: dict[int, float] = {}
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for idx, weight in self.postings[term]:
+                scores[idx] = scores.get(idx, 0.0) + weight
+                matched_idf[idx] = matched_idf.get(idx, 0.0) + idf
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda entry: entry[1])
+        return [(idx, score, matched_idf[idx] / query_idf) for idx, score in best]
+
+
+def reciprocal_rank_fusion(*rankings: list[int], k: int = RRF_K) -> list[int]:
+    """Fuse ranked lists of item indices into one ranking (best first)"""
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking, 1):
+            fused[idx] = fused.get(idx, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=lambda idx: (-fused[idx], idx))
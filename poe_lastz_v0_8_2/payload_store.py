@@ -0,0 +1,102 @@
+"""
+Payload store for Last Z Bot
+Keeps knowledge item payloads (parsed JSON records, chunk metadata) in a file
+on disk; items hold only (offset, length), and a small LRU keeps hot payloads
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Payloads kept decoded in memory (the top results of recent searches)
+PAYLOAD_CACHE_SIZE = int(os.environ.get("PAYLOAD_CACHE_SIZE", "128"))
+
+
+class PayloadStore:
+    """Append-only file of JSON payloads, read back by (offset, length)
+
+    Writes only ever append, so locations handed out stay valid while later
+    (incremental) loads add payloads. Reads use pread and are safe from any
+    thread. Returned payloads are shared with the cache: don't mutate them.
+    """
+
+    def __init__(self, path: str, cache_size: int = PAYLOAD_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._fd = os.open(path, os.O_RDWR)
+        self._size = os.fstat(self._fd).st_size
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[int, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def create(cls, path: str) -> PayloadStore:
+        """Start a new, empty store file at path"""
+        with open(path, "wb"):
+            pass
+        return cls(path)
+
+    def __reduce__(self):
+        # Pickled (e.g. in the compiled bundle) as a reference to its file
+        return PayloadStore, (self.path,)
+
+    def __del__(self):
+        fd = getattr(self, "_fd", None)
+        if fd is not None:
+            os.close(fd)
+
+    def put_many(self, payloads) -> list[tuple[int, int]]:
+        """Append payloads in one write; returns their (offset, length)"""
+        blobs = [
+            json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+            for payload in payloads
+        ]
+        with self._lock:
+            offset = self._size
+            locations = []
+            for blob in blobs:
+                locations.append((offset, len(blob)))
+                offset += len(blob)
+            os.pwrite(self._fd, b"".join(blobs), self._size)
+            self._size = offset
+        return locations
+
+    @property
+    def size(self) -> int:
+        """Bytes written so far (live and superseded payloads)"""
+        return self._size
+
+    def read(self, offset: int, length: int):
+        """Decoded payload at (offset, length), bypassing the LRU"""
+        return json.loads(os.pread(self._fd, length, offset))
+
+    def get(self, offset: int, length: int):
+        """Decoded payload at (offset, length), from the LRU when hot"""
+        with self._lock:
+            payload = self._cache.get(offset)
+            if payload is not None:
+                self._cache.move_to_end(offset)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        payload = self.read(offset, length)
+        with self._lock:
+            self._cache[offset] = payload
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return payload
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "bytes": self._size,
+            "cached": len(self._cache),
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,104 @@
+"""
+Query embedding cache for Last Z Bot
+Bounded LRU with TTL, plus single-flight deduplication of in-flight lookups
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so trivially different messages share a cache entry"""
+    return " ".join(query.casefold().split())
+
+
+class QueryEmbeddingCache:
+    """LRU + TTL cache of query embeddings keyed by normalized query text
+
+    ``coalesced`` counts callers served by another caller's in-flight lookup;
+    joiners whose shared lookup failed count as misses.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(
+        self, query: str, compute: Callable[[str], Awaitable[list[float]]]
+    ) -> list[float]:
+        """Return the cached embedding for query, computing it at most once
+
+        Concurrent callers for the same normalized query share one in-flight
+        ``compute`` call. Empty results (API failures) are not cached.
+        """
+        key = normalize_query(query)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, embedding = entry
+            if time.monotonic() - stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(compute(query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+            # Shield so one cancelled request doesn't cancel the shared lookup
+            return await asyncio.shield(task)
+
+        # Joining an in-flight lookup only counts as a hit if it succeeds, so
+        # the hit rate doesn't look healthy while the provider is down
+        embedding = []
+        try:
+            embedding = await asyncio.shield(task)
+            return embedding
+        finally:
+            if embedding:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+
+    def _store(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        embedding = task.result()
+        if not embedding:
+            return
+
+        self._entries[key] = (time.monotonic(), embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3)
+            if lookups
+            else 0.0,
+        }
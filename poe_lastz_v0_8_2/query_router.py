@@ -0,0 +1,82 @@
+"""
+Local query routing for Last Z Bot
+Decides, without any API call, whether a message needs vector search
+"""
+
+from __future__ import annotations
+
+import re
+
+from poe_lastz_v0_8_2.text_utils import tokenize
+
+# Routes
+CHIT_CHAT = "chit_chat"  # greetings, thanks, empty / image-only messages
+PROMPT_SWITCH = "prompt_switch"  # message is only a !PROMPT command
+ENTITY_LOOKUP = "entity_lookup"  # message just names known heroes/buildings/...
+SEMANTIC_SEARCH = "semantic_search"  # everything else goes to embeddings
+
+# Messages made up only of these words are small talk
+SMALL_TALK_WORDS = frozenset(
+    """
+    hi hey hello yo sup hiya howdy gm gn morning evening afternoon good night
+    thanks thank thx ty tysm cheers appreciate appreciated it you u very much so
+    ok okay k kk cool nice great awesome perfect sweet lol lmao haha hah bye cya
+    later see ya yes yeah yep no nope nah sure got gotcha alright bro dude man
+    there all again
+    """.split()
+)
+
+# Words that may surround entity names in a pure lookup ("Sophia stats",
+# "compare Katrina and Evelyn") without changing what should be retrieved
+LOOKUP_WORDS = frozenset(
+    """
+    a an the and or vs versus compare comparison between of for about on to
+    me show tell give what whats who whos is are info information
+    details detail stats stat skills skill data page profile lookup look up
+    hero heroes building buildings research equipment gear please pls plz
+    """.split()
+)
+
+
+def strip_prompt_command(user_message: str, prompt_name: str | None) -> str:
+    """Remove a !PROMPT / [PROMPT] / {PROMPT} / @PROMPT command from the message"""
+    if not prompt_name:
+        return user_message
+    name = re.escape(prompt_name)
+    pattern = rf"!{name}\b|\[{name}\]|\{{{name}\}}|@{name}\b"
+    return re.sub(pattern, " ", user_message, flags=re.IGNORECASE).strip()
+
+
+def route_message(
+    user_message: str,
+    requested_prompt: str | None = None,
+    entity_matches: list | None = None,
+) -> str:
+    """Classify a message into one of the routes above
+
+    ``entity_matches`` are the known entities found in the message (from
+    ``knowledge_base.find_entities``); the caller computes them once and
+    reuses them for the lookup itself.
+    """
+    text = strip_prompt_command(user_message, requested_prompt)
+    tokens = tokenize(text)
+
+    if not tokens:
+        return PROMPT_SWITCH if requested_prompt else CHIT_CHAT
+
+    if all(token in SMALL_TALK_WORDS for token in tokens):
+        return CHIT_CHAT
+
+    if entity_matches:
+        entity_tokens = set()
+        for match in entity_matches:
+            entity_tokens.update(match["span"].split())
+        leftover = [
+            token
+            for token in tokens
+            if token not in entity_tokens and token not in LOOKUP_WORDS
+        ]
+        if not leftover:
+            return ENTITY_LOOKUP
+
+    return SEMANTIC_SEARCH
@@ -0,0 +1,177 @@
+"""
+Background refresh jobs for Last Z Bot
+Tracks phase, progress, timings and errors of a knowledge base refresh so the
+admin endpoint can return immediately and report status later
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+
+# Finished jobs kept for the status endpoint
+MAX_FINISHED_JOBS = 20
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _merge_requests(first, second):
+    """Combine two (pull, changed_paths, full) requests; None paths = 'check all'"""
+    pull = first[0] or second[0]
+    full = first[2] or second[2]
+    if first[1] is None or second[1] is None:
+        return pull, None, full
+    return pull, first[1] | second[1], full
+
+
+class RefreshJob:
+    """One background refresh: git pull -> diff -> parse -> embed -> publish
+
+    ``pull`` says whether to git pull the data repo first; ``changed_paths``
+    are files already known to have changed locally (None = check every file).
+    ``full`` re-parses every file instead of reusing unchanged files' items.
+    Requests that arrive while the job runs are merged into it; the job then
+    runs one more pass when the current one ends, so the merged request still
+    sees changes made after this pass started.
+    """
+
+    def __init__(self, trigger="admin", pull=True, changed_paths=(), full=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.trigger = trigger
+        self.pull = pull
+        self.changed_paths = None if changed_paths is None else set(changed_paths)
+        self.full = full
+        self.status = QUEUED
+        self.phase = QUEUED
+        self.progress: dict = {}
+        self.timings: dict[str, float] = {}
+        self.errors: list[str] = []
+        self.result: dict | None = None
+        self.requests = 1
+        self.passes = 0
+        self.done = asyncio.Event()
+        self._pending = None  # (pull, changed_paths, full) for one more pass
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._phase_start: float | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def rerun_requested(self) -> bool:
+        return self._pending is not None
+
+    def merge_request(self, pull=True, changed_paths=(), full=False) -> None:
+        """Fold another refresh request into this job"""
+        self.requests += 1
+        request = (pull, None if changed_paths is None else set(changed_paths), full)
+        if self.status == RUNNING:
+            self._pending = (
+                request
+                if self._pending is None
+                else _merge_requests(self._pending, request)
+            )
+        else:
+            self.pull, self.changed_paths, self.full = _merge_requests(
+                (self.pull, self.changed_paths, self.full), request
+            )
+
+    def start_pass(self) -> None:
+        """Begin a (first or repeated) refresh pass"""
+        self._end_phase()
+        if self.started_at is None:
+            self.started_at = time.time()
+        if self._pending is not None:
+            self.pull, self.changed_paths, self.full = self._pending
+            self._pending = None
+        self.status = RUNNING
+        self.passes += 1
+        self.progress = {}
+        self.timings = {}
+
+    def start_phase(self, phase: str) -> None:
+        self._end_phase()
+        self.phase = phase
+        self._phase_start = time.perf_counter()
+
+    def _end_phase(self) -> None:
+        if self._phase_start is not None:
+            elapsed = time.perf_counter() - self._phase_start
+            self.timings[self.phase] = round(elapsed, 4)
+            self._phase_start = None
+
+    def finish(self, result: dict | None = None, error: str | None = None) -> None:
+        self._end_phase()
+        self.finished_at = time.time()
+        self.result = result
+        if error:
+            self.errors.append(error)
+            self.status = FAILED
+        else:
+            self.status = SUCCEEDED
+        self.phase = "done"
+        self.done.set()
+
+    def to_dict(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 4)
+        return {
+            "job_id": self.id,
+            "trigger": self.trigger,
+            "pull": self.pull,
+            "full": self.full,
+            "status": self.status,
+            "phase": self.phase,
+            "progress": self.progress,
+            "timings": self.timings,
+            "elapsed": elapsed,
+            "errors": self.errors,
+            "requests": self.requests,
+            "passes": self.passes,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+        }
+
+
+class RefreshJobRegistry:
+    """The active job (if any) plus the most recent finished ones"""
+
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.jobs: OrderedDict[str, RefreshJob] = OrderedDict()
+        self.max_finished = max_finished
+        self.active: RefreshJob | None = None
+
+    def submit(
+        self, trigger="admin", pull=True, changed_paths=(), full=False
+    ) -> tuple[RefreshJob, bool]:
+        """Return (job, merged): the active job if there is one, else a new one"""
+        if self.active is not None and self.active.active:
+            self.active.merge_request(pull, changed_paths, full)
+            return self.active, True
+        job = RefreshJob(trigger, pull, changed_paths, full)
+        self.active = job
+        self.jobs[job.id] = job
+        self._prune()
+        return job, False
+
+    def get(self, job_id: str) -> RefreshJob | None:
+        if job_id == "latest":
+            return next(reversed(self.jobs.values()), None)
+        return self.jobs.get(job_id)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
@@ -6,16 +6,19 @@ Last Z Bot v0.8.2 - Enhanced Knowledge Delivery with Full JSON Data
 - Maintains disk-based embedding cache for performance
 """
 
+import asyncio
 import hashlib
-import json
 import logging
 import os
+import random
 import subprocess
 import time
 from collections.abc import AsyncIterator
 from datetime import datetime
 
+import numpy as np
 import openai
+from fastapi.responses import JSONResponse
 
 import fastapi_poe as fp
 
@@ -23,6 +26,21 @@ import fastapi_poe as fp
 import poe_lastz_v0_8_2.knowledge_base as knowledge_base
 
 # Import utility modules
+from poe_lastz_v0_8_2.context_blocks import STRUCTURED_TYPES, render_context_block
+from poe_lastz_v0_8_2.context_packer import CONTEXT_TOKEN_BUDGET, pack_context
+from poe_lastz_v0_8_2.embedding_cache import (
+    load_embedding_cache,
+    save_embedding_cache,
+)
+from poe_lastz_v0_8_2.file_watcher import backend as watch_backend
+from poe_lastz_v0_8_2.file_watcher import watch_changes
+from poe_lastz_v0_8_2.kb_bundle import (
+    BUNDLE_FILENAME,
+    bundle_config,
+    load_bundle,
+    save_bundle,
+)
+from poe_lastz_v0_8_2.lexical_index import reciprocal_rank_fusion
 from poe_lastz_v0_8_2.logger import (
     create_interaction_log,
     download_and_store_image,
@@ -34,6 +52,16 @@ from poe_lastz_v0_8_2.prompts import (
     load_prompt_by_name,
     load_system_prompt,
 )
+from poe_lastz_v0_8_2.query_cache import QueryEmbeddingCache
+from poe_lastz_v0_8_2.query_router import (
+    CHIT_CHAT,
+    ENTITY_LOOKUP,
+    PROMPT_SWITCH,
+    SEMANTIC_SEARCH,
+    route_message,
+)
+from poe_lastz_v0_8_2.refresh_job import RefreshJobRegistry
+from poe_lastz_v0_8_2.vector_index import VectorIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -56,6 +84,55 @@ def get_git_commit_hash():
     return "unknown"
 
 
+def get_data_repo_head():
+    """Current commit of the data repo, or None if it can't be read"""
+    try:
+        result = subprocess.run(
+            ["git", "-C", DATA_REPO_PATH, "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        if result.returncode == 0:
+            return result.stdout.strip()
+    except Exception:
+        pass
+    return None
+
+
+def get_changed_data_paths(old_head, new_head):
+    """Paths changed in the data repo between two commits (None if unknown)"""
+    if not old_head or not new_head:
+        return None
+    if old_head == new_head:
+        return []
+    try:
+        result = subprocess.run(
+            [
+                "git",
+                "-C",
+                DATA_REPO_PATH,
+                "diff",
+                "--name-only",
+                "--no-renames",
+                old_head,
+                new_head,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        if result.returncode == 0:
+            return [
+                os.path.join(DATA_REPO_PATH, path)
+                for path in result.stdout.splitlines()
+                if path
+            ]
+    except Exception:
+        pass
+    return None
+
+
 # Bot configuration
 git_hash = get_git_commit_hash()
 deploy_time = datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -80,9 +157,50 @@ openai_api_key = os.environ.get("OPENAI_API_KEY")
 if not openai_api_key:
     raise ValueError("OPENAI_API_KEY environment variable is required but not found!")
 
+# Embedding model shared by knowledge items and queries
+EMBEDDING_MODEL = "text-embedding-3-small"  # Cost-effective model
+
+# Max in-flight embedding requests from the request path (per worker)
+EMBEDDING_CONCURRENCY = int(os.environ.get("EMBEDDING_CONCURRENCY", "8"))
+
+# Query embedding cache: LRU size and TTL (seconds)
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", "3600"))
+
+# Query embedding timeout (seconds) before falling back to lexical-only search
+QUERY_EMBEDDING_TIMEOUT = float(os.environ.get("QUERY_EMBEDDING_TIMEOUT", "5"))
+
+# Candidates taken from each retriever (vector, BM25) before rank fusion
+HYBRID_CANDIDATES = 50
+
+# Lexical-only fallback (no query embedding): least idf-weighted share of the
+# query terms a BM25 hit must contain. Coverage isn't a similarity, so it gets
+# its own cutoff instead of the cosine thresholds
+LEXICAL_MIN_COVERAGE = 0.6
+
+# Knowledge item embedding build: inputs per API call, parallel batches, retries
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_BUILD_CONCURRENCY = int(os.environ.get("EMBEDDING_BUILD_CONCURRENCY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.environ.get("EMBEDDING_MAX_RETRIES", "5"))
+
+# Git checkout of the knowledge base data (pulled by /admin/refresh-data)
+DATA_REPO_PATH = os.environ.get("DATA_REPO_PATH", "/mnt/data/lastz-rag")
+
+# Periodic data sync: seconds between checks (0 = off), +/- random jitter share
+DATA_SYNC_INTERVAL = float(os.environ.get("DATA_SYNC_INTERVAL", "0"))
+DATA_SYNC_JITTER = float(os.environ.get("DATA_SYNC_JITTER", "0.1"))
+
+# Compiled knowledge bundle (items + indexes + vectors) for fast cold starts
+KB_BUNDLE = os.environ.get("KB_BUNDLE", "1").lower() in ("1", "true", "yes")
+
+# Hot-reload files edited under the data directory (local dev, mounted disks)
+KB_WATCH = os.environ.get("KB_WATCH", "0").lower() in ("1", "true", "yes")
+
 try:
     print("🤖 Using OpenAI embeddings API (memory-efficient)")
-    openai_client = openai.OpenAI(api_key=openai_api_key)
+    # Shared async client so query embeddings never block the event loop
+    async_openai_client = openai.AsyncOpenAI(api_key=openai_api_key)
+    embedding_semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
     model = "openai_embeddings"  # Flag for search function
     print("✅ OpenAI client initialized successfully")
 except Exception as e:
@@ -92,6 +210,41 @@ except Exception as e:
 # Cache for pre-computed embeddings (populated at startup)
 knowledge_embeddings = {}
 
+
+# Recent query embeddings (repeated questions skip the embeddings API)
+query_embedding_cache = QueryEmbeddingCache(
+    max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL
+)
+
+# Knowledge base refresh jobs started by /admin/refresh-data
+refresh_jobs = RefreshJobRegistry()
+
+# Strong references to fire-and-forget tasks (asyncio only keeps weak ones)
+background_tasks = set()
+
+# Periodic data sync state (reported on /health)
+data_sync_status = {
+    "enabled": DATA_SYNC_INTERVAL > 0,
+    "interval_seconds": DATA_SYNC_INTERVAL,
+    "mode": None,
+    "checks": 0,
+    "syncs": 0,
+    "last_check": None,
+    "last_sync": None,
+    "last_sync_duration": None,
+    "last_sync_job": None,
+    "last_error": None,
+}
+
+# Data directory watcher state (reported on /health)
+knowledge_watch_status = {
+    "enabled": KB_WATCH,
+    "backend": watch_backend() if KB_WATCH else None,
+    "batches": 0,
+    "last_batch": None,
+    "last_job": None,
+}
+
 # Track startup errors - if set, bot will show support message
 STARTUP_ERROR = None
 
@@ -121,40 +274,94 @@ def get_support_error_message(error_details: str) -> str:
 # EMBEDDINGS AND SEARCH FUNCTIONS START HERE
 
 
-def cosine_similarity(a, b):
-    """Simple cosine similarity calculation"""
-    import math
+def get_item_key(item):
+    """Key used for an item in the knowledge_embeddings cache
 
-    dot_product = sum(x * y for x, y in zip(a, b, strict=False))
-    magnitude_a = math.sqrt(sum(x * x for x in a))
-    magnitude_b = math.sqrt(sum(x * x for x in b))
-    if magnitude_a == 0 or magnitude_b == 0:
-        return 0
-    return dot_product / (magnitude_a * magnitude_b)
+    Hash of the embedding model and the item's searchable text, so a vector is
+    reused wherever the item sits in the list and only changed text is re-embedded.
+    """
+    content = f"{EMBEDDING_MODEL}\n{item.text}"
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
 
 
-def get_openai_embedding(text: str) -> list[float]:
-    """Get embedding from OpenAI API"""
+async def get_openai_embedding_async(text: str) -> list[float]:
+    """Get embedding from OpenAI API without blocking the event loop"""
     try:
-        if not openai_client:
-            print("❌ OpenAI client not available")
-            return []
-        response = openai_client.embeddings.create(
-            model="text-embedding-3-small",  # Cost-effective model
-            input=text,
-        )
+        async with embedding_semaphore:
+            response = await async_openai_client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=text,
+            )
         return response.data[0].embedding
     except Exception as e:
         print(f"❌ OpenAI embedding error: {e}")
         return []
 
 
+async def embed_batch(texts, semaphore):
+    """Embed a batch of texts in one API call, retrying throttled batches"""
+    for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                response = await async_openai_client.embeddings.create(
+                    model=EMBEDDING_MODEL,
+                    input=texts,
+                )
+            return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+        except (
+            openai.RateLimitError,
+            openai.APIConnectionError,
+            openai.InternalServerError,
+        ) as e:
+            if attempt == EMBEDDING_MAX_RETRIES:
+                raise
+            # Exponential backoff with jitter so parallel batches don't retry in lockstep
+            delay = min(30.0, 2**attempt) + random.uniform(0, 1)
+            print(
+                f"   ⚠️ Embedding batch throttled ({type(e).__name__}), "
+                f"retry {attempt + 1}/{EMBEDDING_MAX_RETRIES} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+async def embed_texts(texts, on_progress=None):
+    """Embed many texts using batched, bounded-concurrency API calls
+
+    Returns a list aligned with texts; entries are None for failed batches.
+    ``on_progress(done, total)`` is called after every batch.
+    """
+    semaphore = asyncio.Semaphore(EMBEDDING_BUILD_CONCURRENCY)
+    batches = [
+        texts[i : i + EMBEDDING_BATCH_SIZE]
+        for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)
+    ]
+    done = 0
+
+    async def run_batch(batch_idx, batch):
+        nonlocal done
+        try:
+            embeddings = await embed_batch(batch, semaphore)
+        except Exception as e:
+            print(f"❌ Embedding batch {batch_idx + 1}/{len(batches)} failed: {e}")
+            embeddings = [None] * len(batch)
+        done += len(batch)
+        print(f"   ⏳ Progress: {done}/{len(texts)} items embedded...")
+        if on_progress:
+            on_progress(done, len(texts))
+        return embeddings
+
+    results = await asyncio.gather(
+        *(run_batch(idx, batch) for idx, batch in enumerate(batches))
+    )
+    return [embedding for batch in results for embedding in batch]
+
+
 def get_embeddings_cache_path():
-    """Get the path to the embeddings cache file on Render Disk"""
+    """Get the base path (without extension) of the embeddings cache on Render Disk"""
     # Try Render Disk first, fall back to temp for local dev
     cache_locations = [
-        "/mnt/data/lastz-rag/embeddings_cache.json",  # Render Disk (persistent)
-        "/tmp/embeddings_cache.json",  # Fallback for local dev
+        "/mnt/data/lastz-rag/embeddings_cache",  # Render Disk (persistent)
+        "/tmp/embeddings_cache",  # Fallback for local dev
     ]
 
     for path in cache_locations:
@@ -163,214 +370,328 @@ def get_embeddings_cache_path():
             return path
 
     # Last resort - current directory
-    return "embeddings_cache.json"
+    return "embeddings_cache"
 
 
-def calculate_knowledge_hash():
-    """Calculate hash of knowledge base to detect changes"""
-    # Create a deterministic string from all knowledge items
-    content = ""
-    for item in sorted(knowledge_base.knowledge_items, key=lambda x: x.get("name", "")):
-        content += f"{item.get('type', '')}:{item.get('name', '')}:{item.get('text', '')[:100]}"
+def load_embeddings_from_disk():
+    """Load cached embeddings (content hash -> vector) from disk if available"""
+    global knowledge_embeddings
+
+    cached = load_embedding_cache(get_embeddings_cache_path(), EMBEDDING_MODEL)
+    if cached is None:
+        return False
 
-    return hashlib.md5(content.encode()).hexdigest()
+    knowledge_embeddings = cached
+    return True
 
 
-def load_embeddings_from_disk():
-    """Load cached embeddings from disk if available and valid"""
+def save_embeddings_to_disk():
+    """Save embeddings cache to disk for persistence across restarts"""
+    save_embedding_cache(
+        get_embeddings_cache_path(), EMBEDDING_MODEL, knowledge_embeddings
+    )
+
+
+async def precompute_knowledge_embeddings(items, on_progress=None):
+    """Pre-compute embeddings for the given knowledge items (with disk caching)
+
+    Vectors are cached per item content hash: only new or changed items call
+    the API, and vectors for items no longer in the knowledge base are dropped.
+    Returns counts of reused, generated, failed and dropped embeddings.
+    """
     global knowledge_embeddings
 
-    cache_path = get_embeddings_cache_path()
+    # Start from whatever is cached on disk (or in memory from a previous load)
+    if not knowledge_embeddings:
+        await asyncio.to_thread(load_embeddings_from_disk)
 
-    if not os.path.exists(cache_path):
-        print(f"📂 No embeddings cache found at {cache_path}")
-        return False
+    # Only items with searchable text get embedded
+    wanted = {}
+    for item in items:
+        if item.text:
+            wanted.setdefault(get_item_key(item), item.text)
 
-    try:
-        print(f"📂 Loading embeddings cache from {cache_path}")
-        with open(cache_path) as f:
-            cache_data = json.load(f)
+    missing = {key for key in wanted if key not in knowledge_embeddings}
+    stale = len(knowledge_embeddings.keys() - wanted.keys())
+    embeddings = {
+        key: knowledge_embeddings[key] for key in wanted if key not in missing
+    }
+    print(
+        f"📊 Embeddings: {len(embeddings)} reused, {len(missing)} to generate, "
+        f"{stale} stale dropped"
+    )
 
-        # Verify cache is valid for current knowledge base
-        cached_hash = cache_data.get("knowledge_hash", "")
-        current_hash = calculate_knowledge_hash()
+    failed = 0
+    if missing:
+        print(f"🔄 Generating embeddings for {len(missing)} new or changed items...")
+        start_time = time.time()
+        missing = sorted(missing)
+        vectors = await embed_texts([wanted[key] for key in missing], on_progress)
+        for key, item_embedding in zip(missing, vectors, strict=True):
+            if item_embedding:
+                embeddings[key] = np.asarray(item_embedding, dtype=np.float32)
+            else:
+                failed += 1
+
+        elapsed_time = time.time() - start_time
+        generated = len(missing) - failed
+        print(f"✅ Generated {generated} embeddings in {elapsed_time:.2f}s")
+        if failed:
+            print(f"   ⚠️ {failed} items failed to embed - will retry on next refresh")
+    else:
+        print("🚀 All embeddings served from cache - no API calls needed!")
 
-        if cached_hash != current_hash:
-            print("⚠️  Cache invalid - knowledge base changed (hash mismatch)")
-            print(f"   Cached: {cached_hash[:8]}... Current: {current_hash[:8]}...")
-            return False
+    knowledge_embeddings = embeddings
 
-        knowledge_embeddings = cache_data.get("embeddings", {})
-        cache_version = cache_data.get("version", "unknown")
+    # Save to disk for next restart (failed items are simply absent); the
+    # matrix stack + file rewrite runs off the event loop like parsing does
+    if missing or stale:
+        await asyncio.to_thread(save_embeddings_to_disk)
 
-        print(f"✅ Loaded {len(knowledge_embeddings)} embeddings from disk cache")
-        print(f"   Cache version: {cache_version}, hash: {current_hash[:8]}...")
-        return True
+    return {
+        "reused": len(wanted) - len(missing),
+        "generated": len(missing) - failed,
+        "failed": failed,
+        "stale_dropped": stale,
+    }
 
-    except Exception as e:
-        print(f"❌ Error loading embeddings cache: {e}")
-        return False
 
+def build_vector_index(items):
+    """Pack cached embeddings for items into a contiguous matrix for fast search"""
+    start_time = time.time()
+    rows = []
+    for idx, item in enumerate(items):
+        item_embedding = knowledge_embeddings.get(get_item_key(item))
+        if item_embedding is not None:
+            rows.append((idx, item_embedding))
+
+    vector_index = VectorIndex.build(rows)
+    print(
+        f"🧮 Built vector index: {len(vector_index)} rows "
+        f"({vector_index.nbytes / (1024 * 1024):.2f} MB) in {time.time() - start_time:.3f}s"
+    )
+    return vector_index
 
-def save_embeddings_to_disk():
-    """Save embeddings cache to disk for persistence across restarts"""
-    cache_path = get_embeddings_cache_path()
 
-    try:
-        cache_data = {
-            "version": "0.8.1",
-            "timestamp": datetime.now().isoformat(),
-            "knowledge_hash": calculate_knowledge_hash(),
-            "embeddings_count": len(knowledge_embeddings),
-            "embeddings": knowledge_embeddings,
-        }
+async def publish_knowledge_snapshot(staged, on_progress=None):
+    """Embed a staged snapshot's items, attach its vector index and publish it
 
-        print(f"💾 Saving embeddings cache to {cache_path}")
-        with open(cache_path, "w") as f:
-            json.dump(cache_data, f)
+    Searches keep using the previous snapshot until the single swap at the end.
+    Returns the published snapshot and the embedding counts.
+    """
+    counts = await precompute_knowledge_embeddings(staged.items, on_progress)
+    vector_index = await asyncio.to_thread(build_vector_index, staged.items)
+    published = knowledge_base.publish_snapshot(staged.with_vector_index(vector_index))
+    return published, counts
 
-        # Get file size for logging
-        file_size = os.path.getsize(cache_path) / (1024 * 1024)  # MB
-        print(
-            f"✅ Saved {len(knowledge_embeddings)} embeddings to disk ({file_size:.2f} MB)"
-        )
 
-    except Exception as e:
-        print(f"❌ Error saving embeddings cache: {e}")
+def get_bundle_path():
+    """Compiled knowledge bundle path (next to the embeddings cache)"""
+    return os.path.join(os.path.dirname(get_embeddings_cache_path()), BUNDLE_FILENAME)
 
 
-def precompute_knowledge_embeddings():
-    """Pre-compute embeddings for all knowledge items (with disk caching)"""
-    global knowledge_embeddings
+def init_knowledge_state_dir():
+    """Keep the loader's payload files next to the embeddings cache and bundle"""
+    knowledge_base.state_dir = os.path.dirname(get_bundle_path()) or "."
 
-    # Try to load from disk first
-    if load_embeddings_from_disk():
-        print("🚀 Using cached embeddings from disk - no API calls needed!")
-        return
 
-    # Cache miss or invalid - generate embeddings
-    knowledge_embeddings = {}
-    print(
-        f"🔄 Generating embeddings for {len(knowledge_base.knowledge_items)} knowledge items..."
+async def compile_knowledge_bundle(snapshot):
+    """Write the published snapshot and its loader state to the bundle file"""
+    state = knowledge_base.export_state(snapshot.items)
+    if state is None:
+        print("⚠️ Knowledge bundle skipped - snapshot doesn't match the last load")
+        return False
+    return await asyncio.to_thread(
+        save_bundle,
+        get_bundle_path(),
+        snapshot,
+        state,
+        bundle_config(EMBEDDING_MODEL),
     )
-    print("   (This only happens when knowledge base changes)")
-    start_time = time.time()
 
-    for idx, item in enumerate(knowledge_base.knowledge_items):
-        # Get the searchable text from the item
-        searchable_text = item.get("text", "")
-        if not searchable_text:
-            continue
 
-        # Generate a unique key for this item
-        item_key = f"{item.get('type', 'unknown')}_{item.get('name', 'unnamed')}_{idx}"
+async def load_knowledge_from_bundle():
+    """Publish the compiled bundle, catching up on files changed since
 
-        # Get embedding for knowledge item
-        item_embedding = get_openai_embedding(searchable_text)
-        if item_embedding:
-            knowledge_embeddings[item_key] = item_embedding
+    Returns the published snapshot, or None if there is no usable bundle (the
+    caller then does a full rebuild).
+    """
+    loaded = await asyncio.to_thread(
+        load_bundle, get_bundle_path(), bundle_config(EMBEDDING_MODEL)
+    )
+    if loaded is None:
+        return None
+    staged, state = loaded
+    changed_paths = await asyncio.to_thread(
+        knowledge_base.restore_state, staged.items, state
+    )
+    if changed_paths is None:
+        print("⚠️ Knowledge bundle was built from another data directory")
+        return None
+    if not changed_paths:
+        return knowledge_base.publish_snapshot(staged)
+
+    # Data changed after the bundle was compiled: re-parse just those files
+    print(f"🔁 {len(changed_paths)} files changed since the bundle was compiled")
+    staged, _ = await asyncio.to_thread(
+        knowledge_base.load_knowledge_base,
+        incremental=True,
+        changed_paths=changed_paths,
+    )
+    snapshot, _ = await publish_knowledge_snapshot(staged)
+    await compile_knowledge_bundle(snapshot)
+    return snapshot
+
+
+def build_search_result(item, similarity, match="semantic"):
+    """LLM-facing payload for a single search hit (context pre-rendered at load)
+
+    ``match`` is "entity" (similarity = name match score), "semantic" (cosine
+    similarity) or "keyword" (lexical-only fallback; similarity is None).
+    """
+    context = item.context_block
+    if context is None:
+        context = render_context_block(item)
+    title = item.name or "Unknown"
+    if item.content_start >= 0:
+        # Markdown chunk: say which part of the document it is
+        data = item.data
+        if data.get("chunk_count", 1) > 1:
+            title += f" (part {data['chunk_index'] + 1}/{data['chunk_count']})"
+    return {
+        "context": context,
+        "title": title,
+        "type": item.type,
+        "similarity": similarity,
+        "match": match,
+        "is_structured": item.type in STRUCTURED_TYPES,
+    }
 
-        # Progress indicator every 20 items
-        if (idx + 1) % 20 == 0:
-            print(
-                f"   ⏳ Progress: {idx + 1}/{len(knowledge_base.knowledge_items)} items embedded..."
-            )
 
-    elapsed_time = time.time() - start_time
-    print(f"✅ Generated {len(knowledge_embeddings)} embeddings in {elapsed_time:.2f}s")
-    if len(knowledge_embeddings) > 0:
-        print(
-            f"   Average: {elapsed_time / len(knowledge_embeddings):.3f}s per embedding"
+def dedupe_chunk_hits(hits, items):
+    """Keep only the best-ranked chunk of each markdown section
+
+    Overlapping chunks of one section share a name and mostly their text, so
+    without this they can take every source slot.
+    """
+    seen = set()
+    kept = []
+    for hit in hits:
+        item = items[hit[0]]
+        if item.content_start >= 0:
+            section = (item.type, item.name)
+            if section in seen:
+                continue
+            seen.add(section)
+        kept.append(hit)
+    return kept
+
+
+def is_relevant(result):
+    """Anti-hallucination gate: similarity above 0.3, or a gated keyword hit"""
+    if result["match"] == "keyword":
+        return True  # already held to LEXICAL_MIN_COVERAGE by the search
+    return result["similarity"] > 0.3
+
+
+def format_relevance(result):
+    """How a hit matched, as shown to the LLM next to its source title"""
+    if result["match"] == "keyword":
+        return "keyword match"
+    return f"relevance: {result['similarity']:.2f}"
+
+
+async def get_query_embedding(user_query):
+    """Cached query embedding, or [] if the provider is down or too slow"""
+    try:
+        return await asyncio.wait_for(
+            query_embedding_cache.get(user_query, get_openai_embedding_async),
+            timeout=QUERY_EMBEDDING_TIMEOUT,
         )
-    else:
-        print("   ⚠️ No embeddings generated - knowledge_items appears to be empty")
+    except TimeoutError:
+        # The shared lookup keeps running and will be cached for the next ask
+        print(f"⚠️ Query embedding timed out after {QUERY_EMBEDDING_TIMEOUT}s")
+        return []
 
-    # Save to disk for next restart
-    save_embeddings_to_disk()
 
+async def search_lastz_knowledge(
+    user_query, top_k=5, entity_matches=None, snapshot=None
+):
+    """Hybrid search: OpenAI embeddings + BM25 keywords, fused by reciprocal rank
 
-def search_lastz_knowledge(user_query):
-    """Search using OpenAI embeddings with comprehensive knowledge base"""
+    Entities named in the query (from knowledge_base.find_entities) are
+    returned first with their match score; fused hits fill the remaining slots.
+    Rank fusion only orders the hits: each one must still clear the cosine
+    threshold. If the embeddings API fails or times out, lexical results with
+    at least LEXICAL_MIN_COVERAGE of the query terms are used alone.
+    Everything is read from one snapshot (the one entity_matches came from).
+    """
     start_time = time.time()
+    snapshot = snapshot if snapshot is not None else knowledge_base.snapshot
 
     try:
-        print(f"🔧 OpenAI embedding search called: '{user_query}'")
+        print(f"🔧 Hybrid knowledge search called: '{user_query}'")
         print(
-            f"📚 Searching {len(knowledge_base.knowledge_items)} knowledge items using cached embeddings"
+            f"📚 Searching {len(snapshot.items)} knowledge items using cached embeddings"
         )
 
-        # Get embedding for user query (only 1 API call per query)
-        query_embedding = get_openai_embedding(user_query)
-        if not query_embedding:
+        entity_matches = entity_matches or []
+        entity_ids = [match["item_index"] for match in entity_matches]
+
+        # Lexical candidates need no API call
+        lexical_hits = snapshot.lexical_index.search(
+            user_query, top_k=HYBRID_CANDIDATES
+        )
+
+        # Get embedding for user query (at most 1 API call per distinct query)
+        query_embedding = await get_query_embedding(user_query)
+        hits = [
+            (match["item_index"], match["score"], "entity") for match in entity_matches
+        ]
+        vector_hits = []
+        if query_embedding:
+            vector_hits = snapshot.vector_index.search(
+                query_embedding, top_k=HYBRID_CANDIDATES, threshold=0.2
+            )
+            # RRF decides the order; only hits with a cosine score above 0.2 count
+            similarity = dict(vector_hits)
+            fused = reciprocal_rank_fusion(
+                [idx for idx, _ in vector_hits], [idx for idx, _, _ in lexical_hits]
+            )
+            hits += [
+                (idx, similarity[idx], "semantic")
+                for idx in fused
+                if idx not in entity_ids and idx in similarity
+            ]
+        else:
+            print("⚠️ No query embedding - falling back to lexical (BM25) results")
+            hits += [
+                (idx, None, "keyword")
+                for idx, _, coverage in lexical_hits
+                if idx not in entity_ids and coverage >= LEXICAL_MIN_COVERAGE
+            ]
+        if not hits and not query_embedding:
             return {
                 "query": user_query,
                 "error": "Failed to get embedding for query",
                 "results": [],
             }
 
-        results = []
-
-        # Calculate similarity with each knowledge item using cached embeddings
-        for idx, item in enumerate(knowledge_base.knowledge_items):
-            # Generate the same key used during pre-computation
-            item_key = (
-                f"{item.get('type', 'unknown')}_{item.get('name', 'unnamed')}_{idx}"
-            )
-
-            # Get pre-computed embedding from cache
-            item_embedding = knowledge_embeddings.get(item_key)
-            if not item_embedding:
-                # Skip items without cached embeddings
-                continue
-
-            # Calculate cosine similarity
-            similarity = cosine_similarity(query_embedding, item_embedding)
-
-            if similarity > 0.2:  # Similarity threshold
-                # Extract content for display - ENHANCED FOR v0.8.2
-                item_type = item.get("type", "unknown")
-                item_data = item.get("data", {})
-
-                # For structured data types (JSON), send the full data
-                if item_type in [
-                    "hero",
-                    "research",
-                    "building",
-                    "equipment",
-                ] and isinstance(item_data, dict):
-                    # Format structured JSON data for LLM consumption
-                    content = json.dumps(item_data, indent=2)
-                else:
-                    # For markdown/text content, use the text or content field
-                    searchable_text = item.get("text", "")
-                    content = searchable_text
-                    if "content" in item_data:
-                        content = item_data["content"][
-                            :1000
-                        ]  # Increased limit for better context
-
-                results.append(
-                    {
-                        "content": content,
-                        "title": item.get("name", "Unknown"),
-                        "type": item_type,
-                        "similarity": similarity,
-                        "is_structured": item_type
-                        in ["hero", "research", "building", "equipment"],
-                    }
-                )
-
-        # Sort by similarity and limit results
-        results.sort(key=lambda x: x["similarity"], reverse=True)
-        results = results[:5]  # Increased from 3 to 5 for better context
+        # Pick the top-k winners first, then render payloads only for them
+        hits = dedupe_chunk_hits(hits, snapshot.items)
+        results = [
+            build_search_result(snapshot.items[idx], similarity, match)
+            for idx, similarity, match in hits[:top_k]
+        ]
 
         search_time = time.time() - start_time
         print(
-            f"⚡ OpenAI embedding search: {len(results)} results in {search_time:.2f}s (using cache)"
+            f"⚡ Hybrid search: {len(results)} results in {search_time:.2f}s "
+            f"({len(vector_hits)} vector / {len(lexical_hits)} lexical candidates)"
         )
         if results:
             print(
-                f"   Top result: {results[0]['title']} (similarity: {results[0]['similarity']:.3f})"
+                f"   Top result: {results[0]['title']} ({format_relevance(results[0])})"
             )
 
         return {
@@ -388,6 +709,56 @@ def search_lastz_knowledge(user_query):
         return {"query": user_query, "error": str(e), "results": []}
 
 
+def lookup_entities(user_query, entity_matches, snapshot=None):
+    """Return the structured records of entities named in the query (no API call)"""
+    start_time = time.time()
+    snapshot = snapshot if snapshot is not None else knowledge_base.snapshot
+    results = [
+        build_search_result(
+            snapshot.items[match["item_index"]], match["score"], "entity"
+        )
+        for match in entity_matches
+    ]
+    search_time = time.time() - start_time
+    print(
+        f"🎯 Entity lookup: {', '.join(r['title'] for r in results)} in {search_time * 1000:.2f}ms"
+    )
+    return {
+        "query": user_query,
+        "results": results,
+        "total_found": len(results),
+        "search_time": search_time,
+    }
+
+
+# Guardrail text wrapped around knowledge base results in the prompt
+KNOWLEDGE_CONTEXT_HEADER = (
+    "=== KNOWLEDGE BASE SEARCH RESULTS ===\n"
+    "⚠️ CRITICAL: You MUST base your answer ONLY on the information below. DO NOT add information from your general knowledge or training data.\n"
+    "⚠️ If the user asks about something NOT in these results, say 'I don't have information about that in my knowledge base.'\n\n"
+)
+KNOWLEDGE_CONTEXT_FOOTER = "⚠️ REMINDER: Only use information from the sources above. Do not invent stats, names, or mechanics.\n"
+
+NO_SEARCH_NOTE = """=== NO KNOWLEDGE BASE SEARCH ===
+
+This message is small talk, a mode switch, or an image without text, so no knowledge base search was run.
+Respond naturally and briefly. DO NOT state game stats, hero details, or mechanics from general knowledge - if the user wants specifics, ask what hero, building, or topic they want to know about."""
+
+NO_RESULTS_WARNING = """=== NO KNOWLEDGE BASE RESULTS FOUND ===
+
+CRITICAL: The knowledge base search returned no relevant results for this query.
+
+You MUST respond with:
+"I don't have specific information about that in my knowledge base. Could you rephrase your question or ask about:
+- Hero strategies (Sophia, Katrina, Evelyn, Fiona, etc.)
+- Building and HQ upgrades
+- Research priorities
+- Combat tactics
+- Resource management"
+
+DO NOT attempt to answer from general knowledge. DO NOT make up hero names or game features."""
+
+
 class LastZBot(fp.PoeBot):
     """Last Z Strategy Bot v0.8.1 - Render Hosted Data Collection POC"""
 
@@ -497,84 +868,92 @@ class LastZBot(fp.PoeBot):
         # Track tool calls for data collection
         tool_calls_made = []
 
-        # ALWAYS run knowledge search for every query to prevent hallucinations
+        # One snapshot per request: a concurrent reload can't mix item sets
+        snapshot = knowledge_base.snapshot
+
+        # Route locally first - only semantic questions need an embeddings call
+        entity_matches = knowledge_base.find_entities(user_message, snapshot)
+        route = route_message(user_message, requested_prompt, entity_matches)
+        print(f"🧭 Query route: {route}")
+
         search_result = None
         relevant_results = []  # Track which results we actually use
-        print(f"🔎 Running knowledge base search for: {user_message[:100]}...")
-        tool_calls_made.append("search_lastz_knowledge")
-        search_result = search_lastz_knowledge(user_message)
-        print(f"🔍 Search found {len(search_result.get('results', []))} results")
-        
-        # Filter by relevance threshold (0.3) to prevent hallucination from weak matches
-        if search_result and search_result.get("results"):
-            relevant_results = [r for r in search_result["results"] if r.get("similarity", 0) > 0.3]
-            print(f"🔍 {len(relevant_results)} results above relevance threshold (0.3)")
-
-        # Create conversation for GPT
-        conversation = [
-            fp.ProtocolMessage(role="system", content=CURRENT_SYSTEM_PROMPT),
-        ]
+        if route == ENTITY_LOOKUP:
+            tool_calls_made.append("lookup_lastz_entities")
+            search_result = lookup_entities(user_message, entity_matches, snapshot)
+            relevant_results = search_result["results"]
+        elif route == SEMANTIC_SEARCH:
+            # Run knowledge search for every real question to prevent hallucinations
+            print(f"🔎 Running knowledge base search for: {user_message[:100]}...")
+            tool_calls_made.append("search_lastz_knowledge")
+            search_result = await search_lastz_knowledge(
+                user_message,
+                top_k=3,
+                entity_matches=entity_matches,
+                snapshot=snapshot,
+            )
+            print(f"🔍 Search found {len(search_result.get('results', []))} results")
 
-        # Add search results if available - ENHANCED FOR v0.8.2
-        # Only use results with meaningful relevance (similarity > 0.3) to prevent hallucination
-        if relevant_results:
-            knowledge_context = "=== KNOWLEDGE BASE SEARCH RESULTS ===\n"
-            knowledge_context += "⚠️ CRITICAL: You MUST base your answer ONLY on the information below. DO NOT add information from your general knowledge or training data.\n"
-            knowledge_context += "⚠️ If the user asks about something NOT in these results, say 'I don't have information about that in my knowledge base.'\n\n"
-
-            for idx, result in enumerate(relevant_results[:3], 1):  # Top 3 relevant results
-                knowledge_context += f"📄 SOURCE {idx}: {result['title']} (type: {result['type']}, relevance: {result['similarity']:.2f})\n"
-
-                # Strip metadata from content (remove "Sources:" lines to prevent hallucination)
-                content = result["content"]
-                # Remove lines that start with "Sources:" or similar metadata
-                content_lines = [
-                    line for line in content.split("\n")
-                    if not line.strip().startswith("Sources:") and not line.strip().startswith("Source:")
+            # Filter by relevance threshold (0.3) to prevent hallucination from weak matches
+            if search_result and search_result.get("results"):
+                relevant_results = [
+                    r for r in search_result["results"] if is_relevant(r)
                 ]
-                cleaned_content = "\n".join(content_lines).strip()
-
-                # For structured data, provide clear formatting
-                if result.get("is_structured"):
-                    knowledge_context += "   STRUCTURED DATA (JSON):\n"
-                    # Indent the JSON for readability
-                    for line in cleaned_content.split("\n"):
-                        knowledge_context += f"   {line}\n"
-                else:
-                    # For text/markdown content
-                    knowledge_context += f"   {cleaned_content[:1000]}...\n"
-
-                knowledge_context += "\n"
-
-            knowledge_context += "⚠️ REMINDER: Only use information from the sources above. Do not invent stats, names, or mechanics.\n"
+                print(
+                    f"🔍 {len(relevant_results)} results above relevance threshold (0.3)"
+                )
 
-            conversation.append(
-                fp.ProtocolMessage(role="system", content=knowledge_context)
-            )
+        # Guardrails for this route; knowledge blocks were rendered at load time
+        source_blocks = [
+            f"📄 SOURCE {idx}: {result['title']} (type: {result['type']}, "
+            f"{format_relevance(result)})\n{result['context']}\n"
+            for idx, result in enumerate(relevant_results[:3], 1)  # Top 3 results
+        ]
+        if relevant_results:
+            # Only results that passed the relevance gate get here
+            guidance = KNOWLEDGE_CONTEXT_HEADER + KNOWLEDGE_CONTEXT_FOOTER
+        elif route in (CHIT_CHAT, PROMPT_SWITCH):
+            # No retrieval for small talk / mode switches / image-only messages
+            guidance = NO_SEARCH_NOTE
         else:
             # NO RESULTS - Add explicit constraint to prevent hallucination
-            no_results_warning = """=== NO KNOWLEDGE BASE RESULTS FOUND ===
-
-CRITICAL: The knowledge base search returned no relevant results for this query.
+            guidance = NO_RESULTS_WARNING
 
-You MUST respond with:
-"I don't have specific information about that in my knowledge base. Could you rephrase your question or ask about:
-- Hero strategies (Sophia, Katrina, Evelyn, Fiona, etc.)
-- Building and HQ upgrades
-- Research priorities
-- Combat tactics
-- Resource management"
-
-DO NOT attempt to answer from general knowledge. DO NOT make up hero names or game features."""
+        # Fit prompt, guardrails, knowledge and history into the token budget
+        messages = [
+            msg
+            for msg in request.query
+            if hasattr(msg, "role") and hasattr(msg, "content")
+        ]
+        earlier, latest = messages[:-1], messages[-1:]
+        packed = pack_context(
+            fixed=[CURRENT_SYSTEM_PROMPT, guidance, *(msg.content for msg in latest)],
+            blocks=source_blocks,
+            history=[msg.content for msg in earlier],
+        )
+        relevant_results = [relevant_results[idx] for idx in packed.block_indices]
+        print(
+            f"🧮 Prompt ~{packed.tokens}/{CONTEXT_TOKEN_BUDGET} tokens: "
+            f"{len(packed.blocks)} sources ({packed.trimmed_blocks} trimmed, "
+            f"{packed.dropped_blocks} dropped), {packed.dropped_messages} old messages dropped"
+        )
 
-            conversation.append(
-                fp.ProtocolMessage(role="system", content=no_results_warning)
+        # Create conversation for GPT
+        conversation = [
+            fp.ProtocolMessage(role="system", content=CURRENT_SYSTEM_PROMPT),
+        ]
+        if relevant_results:
+            guidance = (
+                KNOWLEDGE_CONTEXT_HEADER
+                + "".join(packed.blocks)
+                + KNOWLEDGE_CONTEXT_FOOTER
             )
-
-        # Add user messages from request
-        for msg in request.query:
-            if hasattr(msg, "role") and hasattr(msg, "content"):
-                conversation.append(msg)
+        elif source_blocks:
+            # Not even a trimmed source fit the budget
+            guidance = NO_RESULTS_WARNING
+        conversation.append(fp.ProtocolMessage(role="system", content=guidance))
+        conversation += [earlier[idx] for idx in packed.history_indices]
+        conversation += latest
 
         # Create sanitized request
         sanitized_request = fp.QueryRequest(
@@ -691,15 +1070,32 @@ async def startup_event():
     global STARTUP_ERROR
     try:
         print("🚀 App startup - loading knowledge base...")
-        knowledge_base.load_knowledge_base()
-        print(f"✅ Knowledge base loaded - {len(knowledge_base.knowledge_items)} items")
-
-        # Pre-compute embeddings for all knowledge items (one-time cost at startup)
-        print("🔄 Pre-computing embeddings for knowledge base...")
-        precompute_knowledge_embeddings()
+        init_knowledge_state_dir()
+        snapshot = await load_knowledge_from_bundle() if KB_BUNDLE else None
+        if snapshot is None:
+            staged, _ = knowledge_base.load_knowledge_base()
+            print(f"✅ Knowledge base loaded - {len(staged.items)} items")
+
+            # Pre-compute embeddings for all knowledge items (one-time cost at startup)
+            print("🔄 Pre-computing embeddings for knowledge base...")
+            snapshot, _ = await publish_knowledge_snapshot(staged)
+            if KB_BUNDLE:
+                await compile_knowledge_bundle(snapshot)
         print(
-            f"✅ Startup complete - {len(knowledge_base.knowledge_items)} items with {len(knowledge_embeddings)} cached embeddings"
+            f"✅ Startup complete - {len(snapshot.items)} items with {len(snapshot.vector_index)} embeddings"
         )
+
+        # Keep the data fresh without an admin call (DATA_SYNC_INTERVAL > 0)
+        if DATA_SYNC_INTERVAL > 0:
+            task = asyncio.create_task(data_sync_loop())
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+
+        # Edits under the data directory go live without a restart (KB_WATCH=1)
+        if KB_WATCH:
+            task = asyncio.create_task(knowledge_watch_loop())
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
     except Exception as e:
         print(f"❌ CRITICAL STARTUP ERROR: {e}")
         print("🆘 Bot will respond with support contact message")
@@ -716,67 +1112,279 @@ async def health_check():
         "hosting": "render",
         "timestamp": datetime.now().isoformat(),
         "deploy_hash": git_hash,
-        "knowledge_items": len(knowledge_base.knowledge_items),
+        "knowledge_items": len(knowledge_base.snapshot.items),
+        "knowledge_snapshot": knowledge_base.snapshot.stats(),
         "cached_embeddings": len(knowledge_embeddings),
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "payload_store": (
+            knowledge_base.payload_store.stats()
+            if knowledge_base.payload_store
+            else None
+        ),
+        "data_sync": data_sync_status,
+        "knowledge_watch": knowledge_watch_status,
         "enhancements": "Full JSON data delivery for structured content",
     }
 
 
-@app.post("/admin/refresh-data")
-async def refresh_data(api_key: str):
-    """Admin endpoint to refresh knowledge base without redeploying"""
-    import subprocess
-
-    # Simple API key check (set ADMIN_API_KEY in Render env vars)
+def is_admin_request(api_key):
+    """Simple API key check (set ADMIN_API_KEY in Render env vars)"""
     expected_key = os.environ.get("ADMIN_API_KEY", "")
-    if not expected_key or api_key != expected_key:
-        return {"error": "Unauthorized"}, 401
-
-    try:
-        # Run git pull on the mounted data directory
-        result = subprocess.run(
-            ["git", "-C", "/mnt/data/lastz-rag", "pull", "origin", "main"],
+    return bool(expected_key) and api_key == expected_key
+
+
+async def run_refresh_pass(job):
+    """Pull the data repo (if asked) and republish the knowledge base
+
+    Blocking steps (git, file parsing) run in worker threads so bot traffic
+    keeps being served; searches use the old snapshot until the final swap.
+    """
+    git_output = ""
+    old_head = new_head = git_paths = None
+    changed_paths = job.changed_paths
+    if job.pull:
+        # Run git pull on the mounted data directory, noting HEAD before/after
+        job.start_phase("git_pull")
+        old_head = await asyncio.to_thread(get_data_repo_head)
+        result = await asyncio.to_thread(
+            subprocess.run,
+            ["git", "-C", DATA_REPO_PATH, "pull", "origin", "main"],
             capture_output=True,
             text=True,
             timeout=30,
         )
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"git pull failed ({result.returncode}): {result.stderr.strip()}"
+            )
+        git_output = result.stdout
+
+        # Files the pull touched (None = unknown, fall back to mtime/size checks)
+        job.start_phase("git_diff")
+        new_head = await asyncio.to_thread(get_data_repo_head)
+        git_paths = await asyncio.to_thread(get_changed_data_paths, old_head, new_head)
+        if git_paths and not knowledge_base.is_data_within(DATA_REPO_PATH):
+            # Loaded from another checkout: the diff can't be mapped onto it
+            print(
+                f"⚠️ Data directory isn't inside {DATA_REPO_PATH}, "
+                "checking every file for changes instead"
+            )
+            changed_paths = None
+        elif git_paths is None or changed_paths is None:
+            changed_paths = None
+        else:
+            changed_paths = changed_paths | set(git_paths)
+    job.progress["changed_paths"] = (
+        None if changed_paths is None else len(changed_paths)
+    )
 
-        if result.returncode == 0:
-            # Reload knowledge base
-            old_count = len(knowledge_base.knowledge_items)
-            old_embeddings = len(knowledge_embeddings)
+    # Reload knowledge base: only changed files are parsed and chunked
+    job.start_phase("parse")
+    old_snapshot = knowledge_base.snapshot
+    old_embeddings = len(knowledge_embeddings)
+    staged, delta = await asyncio.to_thread(
+        knowledge_base.load_knowledge_base,
+        incremental=not job.full,
+        changed_paths=changed_paths,
+    )
+    job.progress["files"] = {
+        "added": len(delta["added"]),
+        "changed": len(delta["changed"]),
+        "deleted": len(delta["deleted"]),
+        "unchanged": delta["unchanged"],
+    }
+    job.errors.extend(delta["errors"])
 
-            knowledge_base.load_knowledge_base()
-            new_count = len(knowledge_base.knowledge_items)
+    # CRITICAL: Embed new/changed items (unchanged ones hit the cache), then swap
+    job.start_phase("embed")
 
-            # CRITICAL: Regenerate embeddings for new/changed data
-            print("🔄 Regenerating embeddings after data refresh...")
-            precompute_knowledge_embeddings()
-            new_embeddings = len(knowledge_embeddings)
+    def on_progress(done, total):
+        job.progress["embeddings"] = {"done": done, "total": total}
 
-            return {
-                "status": "success",
-                "git_output": result.stdout,
-                "knowledge_items": {
-                    "old": old_count,
-                    "new": new_count,
-                    "changed": new_count - old_count,
-                },
-                "embeddings": {
-                    "old": old_embeddings,
-                    "new": new_embeddings,
-                    "regenerated": new_embeddings > 0,
-                },
-                "timestamp": datetime.now().isoformat(),
-            }
-        else:
-            return {
-                "status": "error",
-                "git_error": result.stderr,
-                "returncode": result.returncode,
+    print("🔄 Regenerating embeddings after data refresh...")
+    snapshot, embedding_counts = await publish_knowledge_snapshot(staged, on_progress)
+
+    # Next cold start loads this snapshot straight from the bundle
+    if KB_BUNDLE:
+        job.start_phase("compile")
+        await compile_knowledge_bundle(snapshot)
+
+    return {
+        "trigger": job.trigger,
+        "git_output": git_output,
+        "git": {
+            "pulled": job.pull,
+            "old_head": old_head,
+            "new_head": new_head,
+            "changed_paths": (
+                None
+                if git_paths is None
+                else [os.path.relpath(path, DATA_REPO_PATH) for path in git_paths]
+            ),
+        },
+        "knowledge_items": {
+            "old": len(old_snapshot.items),
+            "new": len(snapshot.items),
+            "changed": len(snapshot.items) - len(old_snapshot.items),
+        },
+        "files": delta,
+        "snapshot": {
+            "old_version": old_snapshot.version,
+            "new_version": snapshot.version,
+        },
+        "embeddings": {
+            "old": old_embeddings,
+            "new": len(knowledge_embeddings),
+            **embedding_counts,
+        },
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+async def run_refresh_job(job):
+    """Run refresh passes until no merged request is left waiting"""
+    try:
+        while True:
+            job.start_pass()
+            result = await run_refresh_pass(job)
+            if not job.rerun_requested:
+                break
+            print(
+                f"🔁 Refresh job {job.id}: new request arrived mid-run, running again"
+            )
+        job.finish(result)
+        print(f"✅ Refresh job {job.id} finished in {job.to_dict()['elapsed']}s")
+    except Exception as e:
+        print(f"❌ Refresh job {job.id} failed: {e}")
+        job.finish(error=str(e))
+
+
+def start_refresh_job(trigger, pull=True, changed_paths=(), full=False):
+    """Start a background refresh job, or merge into the running one"""
+    job, merged = refresh_jobs.submit(trigger, pull, changed_paths, full)
+    if not merged:
+        task = asyncio.create_task(run_refresh_job(job))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    return job, merged
+
+
+def get_remote_data_changes():
+    """Fetch the data repo; paths origin/main changes vs HEAD (None if unknown)"""
+    result = subprocess.run(
+        ["git", "-C", DATA_REPO_PATH, "fetch", "--quiet", "origin", "main"],
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"git fetch failed ({result.returncode}): {result.stderr.strip()}"
+        )
+    remote_head = subprocess.run(
+        ["git", "-C", DATA_REPO_PATH, "rev-parse", "FETCH_HEAD"],
+        capture_output=True,
+        text=True,
+        timeout=10,
+    ).stdout.strip()
+    return get_changed_data_paths(get_data_repo_head(), remote_head)
+
+
+async def check_data_sync():
+    """One scheduler tick: refresh only if the data actually changed"""
+    data_sync_status["checks"] += 1
+    data_sync_status["last_check"] = datetime.now().isoformat()
+    if os.path.isdir(os.path.join(DATA_REPO_PATH, ".git")):
+        data_sync_status["mode"] = "git"
+        changed_paths = await asyncio.to_thread(get_remote_data_changes)
+        pull, local_paths = True, ()
+    else:
+        data_sync_status["mode"] = "directory"
+        changed_paths = await asyncio.to_thread(knowledge_base.detect_changes)
+        pull, local_paths = False, changed_paths
+    if changed_paths == []:
+        return
+
+    count = "unknown" if changed_paths is None else len(changed_paths)
+    print(f"⏰ Data sync: {count} changed files, starting refresh")
+    job, _ = start_refresh_job("scheduler", pull=pull, changed_paths=local_paths)
+    await job.done.wait()
+
+    data_sync_status["syncs"] += 1
+    data_sync_status["last_sync"] = datetime.now().isoformat()
+    data_sync_status["last_sync_duration"] = job.to_dict()["elapsed"]
+    data_sync_status["last_sync_job"] = job.id
+    data_sync_status["last_error"] = job.errors[-1] if job.errors else None
+
+
+async def data_sync_loop():
+    """Check for data changes every DATA_SYNC_INTERVAL seconds (with jitter)"""
+    print(
+        f"⏰ Data sync every {DATA_SYNC_INTERVAL:g}s (±{DATA_SYNC_JITTER:.0%} jitter)"
+    )
+    while True:
+        jitter = random.uniform(-DATA_SYNC_JITTER, DATA_SYNC_JITTER)
+        await asyncio.sleep(DATA_SYNC_INTERVAL * (1 + jitter))
+        try:
+            await check_data_sync()
+        except Exception as e:
+            print(f"❌ Data sync check failed: {e}")
+            data_sync_status["last_error"] = str(e)
+
+
+async def knowledge_watch_loop():
+    """Re-parse, re-embed and republish just the files edited on disk"""
+    data_path = knowledge_base.find_data_path()
+    roots = await asyncio.to_thread(knowledge_base.watch_roots)
+    print(f"👀 Watching {', '.join(roots)} for changes ({watch_backend()})")
+    try:
+        async for paths in watch_changes(roots, knowledge_base.detect_changes):
+            job, merged = start_refresh_job("watcher", pull=False, changed_paths=paths)
+            print(f"👀 {len(paths)} files changed, hot-reloading (job {job.id})")
+            knowledge_watch_status["batches"] += 1
+            knowledge_watch_status["last_batch"] = {
+                "paths": [os.path.relpath(path, data_path) for path in paths],
+                "at": datetime.now().isoformat(),
             }
+            knowledge_watch_status["last_job"] = job.id
     except Exception as e:
-        return {"status": "error", "message": str(e)}
+        print(f"❌ Knowledge base watcher stopped: {e}")
+        knowledge_watch_status["enabled"] = False
+
+
+@app.post("/admin/refresh-data")
+async def refresh_data(api_key: str, full: bool = False):
+    """Admin endpoint to refresh knowledge base without redeploying
+
+    Starts a background refresh job (or joins the running one) and returns its
+    id immediately; poll /admin/refresh-data/{job_id} for progress. With
+    ``full=true`` every file is re-parsed instead of only the changed ones.
+    """
+    if not is_admin_request(api_key):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    job, merged = start_refresh_job("admin", full=full)
+    return {
+        "status": "accepted",
+        "job_id": job.id,
+        "merged": merged,
+        "status_url": f"/admin/refresh-data/{job.id}",
+        "job": job.to_dict(),
+    }
+
+
+@app.get("/admin/refresh-data/{job_id}")
+async def refresh_status(job_id: str, api_key: str):
+    """Phase, progress, timings and errors of a refresh job ("latest" works too)"""
+    if not is_admin_request(api_key):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(
+            {"error": f"Unknown refresh job '{job_id}'"}, status_code=404
+        )
+    return job.to_dict()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+"""
+Knowledge snapshots for Last Z Bot
+Immutable bundle of knowledge items and every index built over them, published
+by swapping a single reference
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+
+from poe_lastz_v0_8_2.entity_index import EntityIndex
+from poe_lastz_v0_8_2.lexical_index import BM25Index
+from poe_lastz_v0_8_2.vector_index import VectorIndex
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """Items plus the entity, lexical (BM25) and vector indexes over them
+
+    Every index stores positions in ``items``, so the pieces are only valid
+    together. Readers take ``knowledge_base.snapshot`` once per request and use
+    only that object; a reload builds a new snapshot off to the side and
+    publishes it in one assignment, so nobody sees a half-built state.
+    ``version`` is 0 until the snapshot is published.
+    """
+
+    items: tuple = ()
+    entity_index: EntityIndex = field(default_factory=EntityIndex)
+    lexical_index: BM25Index = field(default_factory=BM25Index)
+    vector_index: VectorIndex = field(default_factory=lambda: VectorIndex.build([]))
+    version: int = 0
+    published_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def with_vector_index(self, vector_index: VectorIndex) -> KnowledgeSnapshot:
+        """Copy of this snapshot with embeddings for its items attached"""
+        return replace(self, vector_index=vector_index)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "published_at": self.published_at,
+            "items": len(self.items),
+            "entity_names": len(self.entity_index),
+            "lexical_items": len(self.lexical_index),
+            "vector_rows": len(self.vector_index),
+        }
@@ -0,0 +1,28 @@
+"""
+Shared text normalization for Last Z Bot's local indexes
+"""
+
+from __future__ import annotations
+
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Common English filler words (never entity names or useful search terms)
+STOPWORDS = frozenset(
+    """
+    a about all also an and any are as at be been but by can could do does for
+    from get got has have how i if in into is it its just me my no not of on or
+    our should so than that the their them then there these they this to too
+    up us was we were what when where which who why will with would you your
+    best good vs versus compare
+    """.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Case-folded word tokens, with possessives ("sophia's") reduced to the base word"""
+    return [
+        token[:-2] if token.endswith("'s") else token.replace("'", "")
+        for token in _TOKEN_RE.findall(text.casefold().replace("’", "'"))
+    ]
@@ -0,0 +1,68 @@
+"""
+In-memory vector index for knowledge base search
+Holds all item embeddings as one contiguous float32 matrix
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class VectorIndex:
+    """Contiguous float32 embedding matrix with precomputed row norms
+
+    Row ``i`` of the matrix holds the embedding of knowledge item
+    ``item_ids[i]`` (an index into the owning snapshot's ``items``).
+    """
+
+    def __init__(self, matrix: np.ndarray, item_ids: np.ndarray):
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.norms = np.linalg.norm(self.matrix, axis=1)
+
+    @classmethod
+    def build(cls, rows: list[tuple[int, list[float]]]) -> VectorIndex:
+        """Build an index from (item_id, embedding) pairs"""
+        if not rows:
+            return cls(np.zeros((0, 0), dtype=np.float32), np.zeros(0))
+
+        item_ids = np.fromiter((item_id for item_id, _ in rows), dtype=np.int64)
+        matrix = np.stack(
+            [np.asarray(embedding, dtype=np.float32) for _, embedding in rows]
+        )
+        return cls(matrix, item_ids)
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.norms.nbytes + self.item_ids.nbytes
+
+    def scores(self, query_embedding) -> np.ndarray:
+        """Cosine similarity of the query against every row (one mat-vec)"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query))
+        if len(self) == 0 or query_norm == 0 or query.shape[0] != self.matrix.shape[1]:
+            return np.zeros(len(self), dtype=np.float32)
+
+        dots = self.matrix @ query
+        denom = self.norms * query_norm
+        return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+    def search(
+        self, query_embedding, top_k: int | None = None, threshold: float = 0.0
+    ) -> list[tuple[int, float]]:
+        """Return up to top_k (item_id, similarity) pairs above threshold, best first
+
+        Uses a partial selection (argpartition) so only the k winners are sorted.
+        """
+        scores = self.scores(query_embedding)
+        rows = np.flatnonzero(scores > threshold)
+        if top_k is not None and len(rows) > top_k:
+            if top_k <= 0:
+                return []
+            winners = np.argpartition(-scores[rows], top_k - 1)[:top_k]
+            rows = np.sort(rows[winners])  # keep ties in item order
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return [(int(self.item_ids[row]), float(scores[row])) for row in rows]
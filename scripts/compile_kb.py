@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Compile the knowledge base bundle (items, indexes, vectors) for fast cold starts
+Run from the repo root with OPENAI_API_KEY set: python scripts/compile_kb.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from poe_lastz_v0_8_2 import server  # noqa: E402
+
+
+async def main():
+    server.init_knowledge_state_dir()
+    staged, _ = server.knowledge_base.load_knowledge_base()
+    snapshot, counts = await server.publish_knowledge_snapshot(staged)
+    print(f"📊 Embeddings: {counts}")
+    if not await server.compile_knowledge_bundle(snapshot):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())